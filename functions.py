@@ -4,14 +4,30 @@ import yahooquery as yq
 import datetime as dt
 import pandas as pd
 import json
+import os
+import re
+import threading
+import time
+import sys
+import inspect
+import functools
+import hashlib
+import tempfile
 import investpy
 import numpy as np
 import cvxpy as cp
 import plotly.express as px
+import plotly.graph_objects as go
 import base64
 import requests
 import vectorbt as vbt
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dateutil.relativedelta import relativedelta
+from urllib.parse import quote
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
 import ccxt
 import streamfy as sy
 #ANOMALY DETECTION
@@ -23,6 +39,15 @@ from streamlit_extras.switch_page_button import switch_page
 from st_pages import show_pages, Page, Section, add_indentation
 #MODELS
 from arch import arch_model
+#FORECAST MODELS
+from statsmodels.tsa.holtwinters import (
+    ExponentialSmoothing,
+    SimpleExpSmoothing,
+    Holt
+)
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.stattools import adfuller, kpss
+from sklearn.metrics import mean_absolute_percentage_error
 
 with open("./data/periods_and_intervals_binance.json", "r") as f:
     intervals_binance = json.load(f)
@@ -36,60 +61,617 @@ def image_carousel(images):
     )
     return image_carousel
 
-@st.cache_resource
-def get_unimarket(
-    element, 
-    period,
+#FETCH ENGINE
+FETCH_MAX_WORKERS = 8
+FETCH_RETRIES = 3
+#seconds before the first retry, doubled on every further attempt
+FETCH_BACKOFF = 0.5
+#minimum seconds between two requests sent to the same host
+HOST_MIN_INTERVALS = {
+    "query2.finance.yahoo.com": 0.1,
+}
+SOURCE_HOSTS = {
+    "YFinance": "query2.finance.yahoo.com",
+    "YFinanceDownload": "query2.finance.yahoo.com",
+    "YahooQuery": "query2.finance.yahoo.com",
+}
+host_slots = {}
+host_slots_lock = threading.Lock()
+
+def wait_for_host(host):
+    with host_slots_lock:
+        now = time.monotonic()
+        slot = max(now, host_slots.get(host, now))
+        host_slots[host] = slot + HOST_MIN_INTERVALS.get(host, 0)
+    time.sleep(slot - now)
+
+def fetch_with_retry(host, fetch, *args, **kwargs):
+    for attempt in range(FETCH_RETRIES + 1):
+        wait_for_host(host)
+        try:
+            return fetch(*args, **kwargs)
+        except Exception:
+            if attempt == FETCH_RETRIES:
+                raise
+            time.sleep(FETCH_BACKOFF * 2 ** attempt)
+
+def fetch_many(items, fetch, max_workers = FETCH_MAX_WORKERS):
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        futures = {x: executor.submit(fetch, x) for x in items}
+    results, errors = {}, {}
+    for x, future in futures.items():
+        if future.exception() is None:
+            results[x] = future.result()
+        else:
+            errors[x] = future.exception()
+    return results, errors
+
+#SINGLE FLIGHT
+inflight = {}
+inflight_lock = threading.Lock()
+
+def single_flight(key, load):
+    #concurrent callers with the same key wait for the first one and share its result
+    with inflight_lock:
+        future = inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            inflight[key] = future
+    if not leader:
+        return future.result()
+    try:
+        result = load()
+    except BaseException as error:
+        future.set_exception(error)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with inflight_lock:
+            del inflight[key]
+
+#PRICE STORE
+PRICE_STORE_DIR = "./data/prices"
+PRICE_STORE_META = b"price_store"
+INTERVAL_TIMEDELTAS = {
+    "1m": pd.Timedelta(minutes = 1),
+    "2m": pd.Timedelta(minutes = 2),
+    "5m": pd.Timedelta(minutes = 5),
+    "15m": pd.Timedelta(minutes = 15),
+    "30m": pd.Timedelta(minutes = 30),
+    "60m": pd.Timedelta(hours = 1),
+    "90m": pd.Timedelta(minutes = 90),
+    "1h": pd.Timedelta(hours = 1),
+    "1d": pd.Timedelta(days = 1),
+    "5d": pd.Timedelta(days = 5),
+    "1wk": pd.Timedelta(weeks = 1),
+    "1mo": pd.Timedelta(days = 31),
+    "3mo": pd.Timedelta(days = 92),
+}
+#how far back the provider serves intraday bars, beyond that a tail fetch has to fall back to the full period
+INTRADAY_SPANS = {
+    "1m": pd.Timedelta(days = 7),
+    "2m": pd.Timedelta(days = 60),
+    "5m": pd.Timedelta(days = 60),
+    "15m": pd.Timedelta(days = 60),
+    "30m": pd.Timedelta(days = 60),
+    "60m": pd.Timedelta(days = 730),
+    "90m": pd.Timedelta(days = 60),
+    "1h": pd.Timedelta(days = 730),
+}
+#daily and longer bars are final once the US session has closed
+SESSION_CLOSE_UTC = pd.Timedelta(hours = 21)
+PERIOD_OFFSETS = {
+    "1mo": relativedelta(months = 1),
+    "3mo": relativedelta(months = 3),
+    "6mo": relativedelta(months = 6),
+    "1y": relativedelta(years = 1),
+    "2y": relativedelta(years = 2),
+    "5y": relativedelta(years = 5),
+    "10y": relativedelta(years = 10),
+}
+
+def fetch_history(
+    symbol,
     interval,
-    source):
+    source,
+    period = None,
+    start = None,
+    end = None):
+    #only forward the arguments that were given, so "start" is never shadowed by a default period
+    kwargs = {
+        key: value
+        for key, value 
+        in {"period": period, "start": start, "end": end}.items() 
+        if value is not None}
     if source == "YFinance":
-        ticker = yf.Ticker(element)
+        data = yf.Ticker(symbol).history(interval = interval, **kwargs)
+    elif source == "YFinanceDownload":
+        data = yf.download(symbol, interval = interval, progress = False, **kwargs)
     elif source == "YahooQuery":
-        ticker = yq.Ticker(element)
+        data = yq.Ticker(symbol).history(interval = interval, **kwargs)
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError(f"No price history for {symbol}: {data}")
+        if isinstance(data.index, pd.MultiIndex):
+            data = data.xs(symbol, level = 0)
+        data.index = pd.to_datetime(data.index)
     else:
         raise ValueError("Choose YFinance or YahooQuery as data source")
-    data = ticker.history(
-        period = period,
-        interval = interval
+    return data
+
+def fetch_history_retry(symbol, interval, source, **kwargs):
+    return fetch_with_retry(
+        SOURCE_HOSTS[source], 
+        fetch_history, 
+        symbol, 
+        interval, 
+        source, 
+        **kwargs)
+
+def period_start(period, now):
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(now.year, 1, 1, tz = "UTC")
+    if period.endswith("d"):
+        #trading-day periods: leave room for weekends and holidays
+        return now - pd.Timedelta(days = int(period[:-1]) * 7 // 5 + 4)
+    return now - PERIOD_OFFSETS[period]
+
+def last_session_close(now):
+    close = now.normalize() + SESSION_CLOSE_UTC
+    if close > now:
+        close -= pd.Timedelta(days = 1)
+    return close
+
+def prices_stale(updated, interval, now):
+    #the last stored bar may have changed since the update: intraday once a bar has passed,
+    #daily and longer bars once a session has closed
+    if interval in INTRADAY_SPANS:
+        return now - updated > INTERVAL_TIMEDELTAS[interval]
+    return updated < last_session_close(now)
+
+def utc_timestamp(timestamp):
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+def localize_timestamp(timestamp, index):
+    if index.tz is None:
+        return timestamp.tz_convert(None)
+    return timestamp.tz_convert(index.tz)
+
+def slice_period(data, period, now):
+    if data.empty or period == "max":
+        return data
+    if period.endswith("d") and period != "ytd":
+        sessions = data.index.normalize().unique()[-int(period[:-1]):]
+        return data[data.index.normalize().isin(sessions)]
+    return data[data.index >= localize_timestamp(period_start(period, now), data.index)]
+
+def merge_prices(old, new):
+    if old is None or old.empty:
+        return new
+    if new is None or new.empty:
+        return old
+    data = pd.concat([old, new])
+    return data[~data.index.duplicated(keep = "last")].sort_index()
+
+def price_store_path(symbol, interval, source):
+    return os.path.join(
+        PRICE_STORE_DIR, 
+        source.lower(), 
+        interval, 
+        quote(symbol, safe = "") + ".parquet")
+
+def read_price_store(symbol, interval, source):
+    path = price_store_path(symbol, interval, source)
+    try:
+        #one open handle: the file at `path` can be swapped between two opens
+        with open(path, "rb") as f:
+            table = pq.read_table(f)
+        meta = json.loads(table.schema.metadata[PRICE_STORE_META])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, None
+    meta["start"] = None if meta["start"] is None else pd.Timestamp(meta["start"])
+    meta["updated"] = pd.Timestamp(meta["updated"])
+    return table.to_pandas(), meta
+
+def write_price_store(symbol, interval, source, data, meta):
+    path = price_store_path(symbol, interval, source)
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    #the metadata lives in the parquet schema, so bars and coverage are swapped in together
+    table = pa.Table.from_pandas(data)
+    table = table.replace_schema_metadata({
+        **table.schema.metadata,
+        PRICE_STORE_META: json.dumps({
+            "start": None if meta["start"] is None else meta["start"].isoformat(),
+            "updated": meta["updated"].isoformat()
+        })})
+    #a unique temporary file per writer, so concurrent workers never write or read a partial file
+    fd, tmp = tempfile.mkstemp(dir = os.path.dirname(path), suffix = ".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pq.write_table(table, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def load_prices(
+    symbol,
+    period,
+    interval,
+    source,
+    fetch = fetch_history_retry,
+    refresh = "incremental"):
+    return single_flight(
+        ("load_prices", symbol, period, interval, source, fetch, refresh),
+        lambda: update_prices(symbol, period, interval, source, fetch, refresh))
+
+def update_prices(
+    symbol,
+    period,
+    interval,
+    source,
+    fetch,
+    refresh):
+    now = pd.Timestamp.now(tz = "UTC")
+    start = period_start(period, now)
+    if interval in INTRADAY_SPANS:
+        #the provider serves nothing older than its intraday span, never ask for a head before it
+        earliest = now - INTRADAY_SPANS[interval]
+        start = earliest if start is None else max(start, earliest)
+    stored, meta = read_price_store(symbol, interval, source)
+    if stored is None or stored.empty:
+        data = fetch(symbol, interval, source, period = period)
+        if not data.empty:
+            write_price_store(
+                symbol, 
+                interval, 
+                source, 
+                data, 
+                {
+                    "start": start, 
+                    "updated": now
+                })
+        return slice_period(data, period, now)
+    head_missing = meta["start"] is not None and (start is None or start < meta["start"])
+    stale = prices_stale(meta["updated"], interval, now)
+    if head_missing and start is None:
+        stored = merge_prices(stored, fetch(symbol, interval, source, period = period))
+        meta = {"start": None, "updated": now}
+    else:
+        if head_missing:
+            head = fetch(
+                symbol, 
+                interval, 
+                source, 
+                start = localize_timestamp(start, stored.index), 
+                end = stored.index[0])
+            #an empty head is covered too: the period can start on a day without bars
+            stored = merge_prices(head, stored)
+            meta["start"] = start
+        if stale:
+            last = stored.index[-1]
+            if refresh == "incremental" and now - utc_timestamp(last) < INTRADAY_SPANS.get(interval, pd.Timedelta.max):
+                #the last stored bar may still have been open: fetch from it onwards and replace it
+                tail = fetch(symbol, interval, source, start = last)
+                if not tail.empty:
+                    stored = merge_prices(stored[stored.index < last], tail)
+            else:
+                stored = merge_prices(stored, fetch(symbol, interval, source, period = period))
+            meta["updated"] = now
+    if head_missing or stale:
+        write_price_store(symbol, interval, source, stored, meta)
+    return slice_period(stored, period, now)
+
+def naive_index(data):
+    #align tickers from different exchanges on one calendar
+    if data.index.tz is not None:
+        data = data.copy()
+        data.index = data.index.tz_localize(None)
+    return data
+
+#BOUNDED CACHE
+CACHE_MAX_BYTES = 512 * 1024 ** 2
+TICKER_MODULES_MAX_ENTRIES = 200
+
+def interval_ttl(interval):
+    if interval in INTRADAY_SPANS:
+        return INTERVAL_TIMEDELTAS[interval].total_seconds()
+    now = pd.Timestamp.now(tz = "UTC")
+    return (last_session_close(now) + pd.Timedelta(days = 1) - now).total_seconds()
+
+def object_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep = True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep = True))
+    if isinstance(value, vbt.Data):
+        return sum(object_size(x) for x in value.data.values())
+    if isinstance(value, (tuple, list)):
+        return sum(object_size(x) for x in value)
+    if isinstance(value, dict):
+        return sum(object_size(x) for x in value.values())
+    return sys.getsizeof(value)
+
+def cache_key(value):
+    if isinstance(value, (pd.Series, pd.Index, list)):
+        return tuple(value)
+    return value
+
+class BoundedCache:
+    #LRU over the estimated size of the cached values, with a TTL per entry
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+        self.lock = threading.Lock()
+
+    def pop(self, key):
+        value, size, expires = self.entries.pop(key)
+        self.size -= size
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries and self.entries[key][2] < time.time():
+                self.pop(key)
+                self.stats["expirations"] += 1
+            if key not in self.entries:
+                self.stats["misses"] += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return True, self.entries[key][0]
+
+    def put(self, key, value, ttl):
+        size = object_size(value)
+        with self.lock:
+            if key in self.entries:
+                self.pop(key)
+            self.entries[key] = (value, size, time.time() + ttl)
+            self.size += size
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                self.pop(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+
+loaders_cache = BoundedCache(CACHE_MAX_BYTES)
+
+def cache_stats():
+    with loaders_cache.lock:
+        return dict(
+            loaders_cache.stats,
+            entries = len(loaders_cache.entries),
+            bytes = loaders_cache.size)
+
+def bounded_cache(interval_arg = None):
+    def decorator(function):
+        signature = inspect.signature(function)
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            key = (function.__name__,) + tuple(
+                cache_key(x) for x in arguments.arguments.values())
+            hit, value = loaders_cache.get(key)
+            if not hit:
+                value = single_flight(key, lambda: function(*args, **kwargs))
+                loaders_cache.put(
+                    key,
+                    value,
+                    interval_ttl(arguments.arguments[interval_arg] if interval_arg else "1d"))
+            return value
+        return wrapper
+    return decorator
+
+#TICKER FACADE
+FUNDAMENTALS_TTL = 60 * 60
+PREFETCH_WORKERS = 8
+#YahooQuery attributes served by the quoteSummary endpoint, which can be requested together
+QUOTE_SUMMARY_MODULES = {
+    "financial_data": "financialData",
+    "key_stats": "defaultKeyStatistics",
+    "price": "price",
+    "calendar_events": "calendarEvents",
+    "earnings": "earnings",
+    "earnings_trend": "earningsTrend",
+    "index_trend": "indexTrend",
+    "major_holders": "majorHoldersBreakdown",
+    "earning_history": "earningsHistory",
+    "insider_holders": "insiderHolders",
+    "insider_transactions": "insiderTransactions",
+    "recommendation_trend": "recommendationTrend",
+}
+QUOTE_SUMMARY_DATAFRAMES = [
+    "earning_history",
+    "insider_holders",
+    "insider_transactions",
+    "recommendation_trend",
+]
+
+class LazyTicker:
+    #builds the wrapped ticker on first use and keeps every module it served for `ttl` seconds
+    def __init__(self, factory, ttl = None):
+        self._factory = factory
+        self._ttl = ttl
+        self._ticker = None
+        self._modules = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ticker(self):
+        with self._lock:
+            if self._ticker is None:
+                self._ticker = self._factory()
+        return self._ticker
+
+    def fresh(self, key):
+        if key not in self._modules:
+            return False
+        return self._ttl is None or time.time() - self._modules[key][1] <= self._ttl
+
+    def store(self, key, value):
+        self._modules[key] = (value, time.time())
+
+    def _cached(self, key, load):
+        if not self.fresh(key):
+            try:
+                self.store(key, load())
+            except Exception as error:
+                #failures are kept for the ttl as well, so modules missing for an asset are not requested on every rerun
+                self.store(key, error)
+        value = self._modules[key][0]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if callable(getattr(type(self.ticker), name, None)):
+            return lambda *args, **kwargs: self._cached(
+                (name, args, tuple(sorted(kwargs.items()))),
+                lambda: getattr(self.ticker, name)(*args, **kwargs))
+        return self._cached(name, lambda: getattr(self.ticker, name))
+
+def load_module(lazy_ticker, name):
+    try:
+        value = getattr(lazy_ticker, name)
+        if callable(value):
+            value()
+    except Exception:
+        pass
+
+def prefetch_modules(
+    element,
+    ticker_yf,
+    ticker_yq,
+    yf_modules,
+    yq_modules):
+    #quoteSummary modules go out as one request
+    batched = [
+        x for x in yq_modules 
+        if x in QUOTE_SUMMARY_MODULES and not ticker_yq.fresh(x)]
+    if batched:
+        try:
+            data = ticker_yq.ticker.get_modules(
+                [QUOTE_SUMMARY_MODULES[x] for x in batched])[element]
+        except Exception:
+            data = {}
+        for x in batched:
+            if isinstance(data, dict) and QUOTE_SUMMARY_MODULES[x] in data:
+                value = {element: data[QUOTE_SUMMARY_MODULES[x]]}
+                if x in QUOTE_SUMMARY_DATAFRAMES:
+                    value = ticker_yq.ticker._to_dataframe(
+                        value,
+                        data_filter = ticker_yq.ticker._MODULES_DICT[QUOTE_SUMMARY_MODULES[x]]["filter"])
+                ticker_yq.store(x, value)
+    #every other endpoint is fetched by a bounded pool
+    pending = [
+        (lazy_ticker, x)
+        for lazy_ticker, modules in [(ticker_yq, yq_modules), (ticker_yf, yf_modules)]
+        for x in modules
+        if not (lazy_ticker.fresh(x) or lazy_ticker.fresh((x, (), ())))]
+    with ThreadPoolExecutor(max_workers = PREFETCH_WORKERS) as executor:
+        list(executor.map(lambda item: load_module(*item), pending))
+
+@st.cache_resource(
+    ttl = FUNDAMENTALS_TTL,
+    max_entries = TICKER_MODULES_MAX_ENTRIES)
+def get_ticker_modules(element):
+    return (
+        LazyTicker(lambda: yf.Ticker(element), ttl = FUNDAMENTALS_TTL),
+        LazyTicker(lambda: yq.Ticker(element), ttl = FUNDAMENTALS_TTL))
+
+@bounded_cache(interval_arg = "interval")
+def get_unimarket(
+    element, 
+    period,
+    interval):
+    ticker_yf, ticker_yq = get_ticker_modules(element)
+    data = load_prices(
+        element,
+        period,
+        interval,
+        "YFinance"
     )
     return (
-        ticker, 
+        ticker_yf,
+        ticker_yq,
         data)
 
-@st.cache_resource
+@bounded_cache(interval_arg = "interval")
 def get_unistats(
     element, 
     period,
     interval,
     source = None):
     ticker = yf.Ticker(element)
-    data = yf.download(
+    data = load_prices(
         element,
-        period = period,
-        interval = interval
+        period,
+        interval,
+        "YFinanceDownload"
     )
     return ticker, data
 
-@st.cache_resource
+#columns of the multi-ticker frame when no ticker could be loaded
+MULTIMARKET_FEATURES = ["Open", "High", "Low", "Close", "Volume"]
+
+@bounded_cache(interval_arg = "interval")
 def get_multimarket(
     elements, 
     period,
     interval,
     source):
+    elements = list(elements)
+    if source not in ["YFinance", "YahooQuery"]:
+        raise ValueError("Choose YFinance or YahooQuery as data source")
+    frames, errors = fetch_many(
+        elements,
+        lambda element: load_prices(element, period, interval, source))
     if source == "YFinance":
-        elements_ = " ".join(elements)
-        tickers = yf.Tickers(elements_)
-    elif source == "YahooQuery":
-        tickers = yq.Ticker(elements)
+        if frames:
+            data = pd.concat(
+                {element: naive_index(frame) for element, frame in frames.items()},
+                axis = 1)\
+                    .swaplevel(0, 1, axis = 1)
+            features = data.columns.get_level_values(0).unique()
+        else:
+            data = pd.DataFrame(index = pd.DatetimeIndex([]))
+            features = MULTIMARKET_FEATURES
+        #tickers that failed keep empty columns, as yf.download does
+        data = data.reindex(
+            columns = pd.MultiIndex.from_product([
+                features,
+                elements]))
+    elif frames:
+        data = pd.concat(
+            frames, 
+            names = ["symbol", "date"])
     else:
-        raise ValueError("Choose YFinance or YahooQuery as data source")
-    data = tickers.history(
-        period = period,
-        interval = interval
-    )
+        data = pd.DataFrame(
+            columns = MULTIMARKET_FEATURES,
+            index = pd.MultiIndex.from_arrays([[], []], names = ["symbol", "date"]))
     return (
-        tickers, 
-        data)
+        data, 
+        errors)
+
+def get_multimarket_news(elements):
+    tickers_yf = {element: get_ticker_modules(element)[0] for element in elements}
+    news, errors = fetch_many(
+        elements,
+        lambda element: tickers_yf[element].news)
+    return news
 
 def indicator_metrics(
     stock,
@@ -106,13 +688,13 @@ def indicator_metrics(
         for x in metrics:
             rows.metric(
                 label = x,
-                value = ticker.__getattribute__(attribute)[indicators[x]]
+                value = getattr(ticker, attribute)[indicators[x]]
             )
     elif source == "YahooQuery":
         for x in metrics:
             rows.metric(
                 label = x,
-                value = ticker.__getattribute__(attribute)[stock][indicators[x]]
+                value = getattr(ticker, attribute)[stock][indicators[x]]
             )
     style_metric_cards(
         background_color = "#000000"
@@ -144,19 +726,103 @@ def general_indicator_metrics(
         for x in general_indicators:
             rows.metric(
                 label = x,
-                value = _ticker.__getattribute__(_attribute)[_indicators[x]]
+                value = getattr(_ticker, _attribute)[_indicators[x]]
             )
     elif _source == "YahooQuery":
         for x in general_indicators:
             rows.metric(
                 label = x,
-                value = _ticker.__getattribute__(_attribute)[_stock][_indicators[x]]
+                value = getattr(_ticker, _attribute)[_stock][_indicators[x]]
             )
     style_metric_cards(
         background_color = "#000000",
         border_color = "#FF0000"
     )
 
+#CHARTS
+def volume_colors(data):
+    return np.where(data["Open"].values - data["Close"].values >= 0, "#FF0000", "#00FF00")
+
+def chart_rangebreaks(index):
+    #calendar days between the first and the last bar without any bar,
+    #weekends collapsed into one bounds pattern when the asset never trades on them
+    days = pd.DatetimeIndex(index)
+    if days.tz is not None:
+        days = days.tz_localize(None)
+    days = days.normalize().unique()
+    dt_breaks = pd.date_range(start = days[0], end = days[-1], freq = "D").difference(days)
+    rangebreaks = []
+    if not (days.dayofweek >= 5).any():
+        rangebreaks.append(dict(bounds = ["sat", "mon"]))
+        dt_breaks = dt_breaks[dt_breaks.dayofweek < 5]
+    rangebreaks.append(dict(values = dt_breaks.strftime("%Y-%m-%d").tolist()))
+    return rangebreaks
+
+def chart_prep(data, index = None):
+    #index: bars the chart spans when data has been downsampled
+    return {
+        "volume_colors": volume_colors(data),
+        "rangebreaks": chart_rangebreaks(data.index if index is None else index)
+    }
+
+#points sent to the browser per trace, about the pixel width of a wide chart
+CHART_MAX_POINTS = 1500
+
+def lttb_indices(y, n_out):
+    #largest triangle three buckets over the bar positions, first and last points always kept
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype = float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype = int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + np.argmax(area)
+        selected[i + 1] = a
+    return selected
+
+def downsample_line(series, n_out = CHART_MAX_POINTS):
+    series = series.dropna()
+    return series.iloc[lttb_indices(series.values.astype(float), n_out)]
+
+def downsample_ohlc(data, n_out = CHART_MAX_POINTS):
+    #consecutive bars merged into n_out candles stamped with their first bar
+    if len(data) <= n_out:
+        return data
+    buckets = np.arange(len(data)) * n_out // len(data)
+    aggregations = {column: "last" for column in data.columns}
+    aggregations.update({
+        column: aggregation
+        for column, aggregation 
+        in {"Open": "first", "High": "max", "Low": "min", "Volume": "sum"}.items()
+        if column in data.columns})
+    result = data.groupby(buckets).agg(aggregations)
+    result.index = data.index[np.unique(buckets, return_index = True)[1]]
+    return result
+
+def chart_window(container, index, key):
+    #zoom window over the bars, the chart is re-sliced and downsampled again at the higher resolution
+    naive_index = pd.DatetimeIndex(index)
+    if naive_index.tz is not None:
+        naive_index = naive_index.tz_localize(None)
+    if len(naive_index) < 2:
+        return np.ones(len(naive_index), dtype = bool)
+    start, end = container.slider(
+        label = "Zoom window",
+        min_value = naive_index[0].to_pydatetime(),
+        max_value = naive_index[-1].to_pydatetime(),
+        value = (naive_index[0].to_pydatetime(), naive_index[-1].to_pydatetime()),
+        step = max(naive_index.to_series().diff().min(), pd.Timedelta(minutes = 1)).to_pytimedelta(),
+        key = key
+    )
+    return (naive_index >= start) & (naive_index <= end)
+
 def get_news(news):
     try:
         news_df = pd.DataFrame(news)
@@ -231,18 +897,215 @@ def split_key_name(string):
                 if y.islower() 
                 else " " + y, string)).capitalize()
 
+#CATALOGS
+SYMBOLS_DIR = "./data/symbols"
+CATALOG_DIR = "./data/catalogs"
+
+def build_symbol_catalog():
+    markets = []
+    for file in sorted(os.listdir(SYMBOLS_DIR)):
+        with open(os.path.join(SYMBOLS_DIR, file), "r") as f:
+            market_data = pd.json_normalize(json.load(f))
+        market_data.insert(0, "market_name", file[:-len(".json")].upper())
+        markets.append(market_data)
+    catalog = pd.concat(markets, ignore_index = True)
+    catalog["options"] = catalog["symbol"] + " - " + catalog["longName"] + " (" + catalog["shortName"] + ")"
+    return catalog.sort_values(by = ["market_name", "symbol"])
+
+def build_index_catalog():
+    index_data = investpy.indices.get_indices()
+    index_data["options"] = index_data["symbol"] + " - " + index_data["name"]
+    index_data["country"] = index_data["country"].str.upper()
+    index_data["symbol_yf"] = "^" + index_data["symbol"]
+    return index_data
+
+def build_fund_catalog():
+    funds_data = investpy.funds.get_funds()
+    funds_data["options"] = funds_data["symbol"] + " - " + funds_data["name"]
+    funds_data["country"] = funds_data["country"].str.upper()
+    return funds_data
+
+def build_etf_catalog():
+    etf_data = investpy.etfs.get_etfs()
+    etf_data["options"] = etf_data["symbol"] + " - " + etf_data["name"]
+    etf_data["country"] = etf_data["country"].str.upper()
+    return etf_data
+
+def build_currency_cross_catalog():
+    cc_data = investpy.currency_crosses.get_currency_crosses()
+    cc_data["symbol_yf"] = cc_data["base"] + cc_data["second"] + "=X"
+    cc_data["options"] = cc_data["full_name"]
+    return cc_data
+
+def build_crypto_catalog():
+    crypto_data = investpy.crypto.get_cryptos()
+    crypto_data["options"] = crypto_data["symbol"] + " - " + crypto_data["name"]
+    crypto_data["symbol_yf"] = crypto_data["symbol"] + "-" + crypto_data["currency"]
+    return crypto_data
+
+def build_bond_catalog():
+    bond_data = pd.read_json("./data/bonds.json")
+    bond_data["options"] = bond_data["Symbol"] + " - " + bond_data["Name"]
+    return bond_data
+
+def build_commodity_catalog():
+    commodity_data = pd.read_json("./data/commodities.json")
+    commodity_data["options"] = commodity_data["Symbol"] + " - " + commodity_data["Name"]
+    return commodity_data
+
+#name: (builder, column the options are grouped by, local files the snapshot is rebuilt from when they change)
+#the investpy snapshots are only rebuilt by the refresh command: python functions.py [catalog ...]
+CATALOGS = {
+    "symbols": (build_symbol_catalog, "market_name", [SYMBOLS_DIR]),
+    "indices": (build_index_catalog, "country", []),
+    "funds": (build_fund_catalog, "country", []),
+    "etfs": (build_etf_catalog, "country", []),
+    "currency_crosses": (build_currency_cross_catalog, None, []),
+    "cryptos": (build_crypto_catalog, None, []),
+    "bonds": (build_bond_catalog, None, ["./data/bonds.json"]),
+    "commodities": (build_commodity_catalog, None, ["./data/commodities.json"]),
+}
+
+def catalog_path(name):
+    return os.path.join(CATALOG_DIR, f"{name}.parquet")
+
+def write_catalog(catalog, path):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    tmp_path = path + ".tmp"
+    catalog.reset_index(drop = True).to_parquet(tmp_path, index = False)
+    os.replace(tmp_path, path)
+
+def source_mtime(path):
+    if os.path.isdir(path):
+        return max(
+            (os.path.getmtime(os.path.join(path, file)) for file in os.listdir(path)), 
+            default = 0)
+    return os.path.getmtime(path)
+
+def catalog_outdated(path, sources):
+    return (
+        not os.path.exists(path) 
+        or os.path.getmtime(path) < max(map(source_mtime, sources), default = 0))
+
+def refresh_catalog(name):
+    build, group_column, sources = CATALOGS[name]
+    write_catalog(build(), catalog_path(name))
+
+def catalog_options(options):
+    return sorted(options.dropna().unique())
+
+@st.cache_resource
+def load_catalog(name):
+    build, group_column, sources = CATALOGS[name]
+    path = catalog_path(name)
+    if catalog_outdated(path, sources):
+        refresh_catalog(name)
+    data = pd.read_parquet(path)
+    options = data["options"].dropna()[::-1]
+    catalog = {
+        "data": data,
+        "options": catalog_options(options),
+        #reversed so that a duplicated label keeps its first row
+        "index": dict(zip(options, options.index))
+    }
+    if group_column is not None:
+        catalog["groups"] = {
+            group: catalog_options(group_data["options"])
+            for group, group_data 
+            in data.groupby(group_column)}
+    return catalog
+
+def catalog_record(catalog, option):
+    return catalog["data"].iloc[catalog["index"][option]]
+
+def catalog_rows(catalog, options):
+    return catalog["data"].iloc[sorted(catalog["index"][option] for option in options)]
+
+def group_options(catalog, groups):
+    return sorted(set().union(*[catalog["groups"][group] for group in groups]))
+
+@st.cache_resource
+def market_options():
+    with open("./data/market_list.json", "r") as f:
+        return sorted([market["market"].upper() for market in json.load(f)])
+
+#SYMBOL SEARCH
+SEARCH_LIMIT = 50
+CRYPTO_SOURCES = ("BINANCE", "CCXT")
+
+def search_tokens(text):
+    return re.findall(r"[0-9a-z]+", text.lower())
+
+class SymbolSearch:
+    def __init__(self, symbols, labels, sources, texts):
+        order = sorted(range(len(symbols)), key = lambda i: symbols[i].lower())
+        self.labels = np.array(labels, dtype = object)[order]
+        self.source_names = sorted(set(sources))
+        source_codes = {source: code for code, source in enumerate(self.source_names)}
+        self.sources = np.array([source_codes[source] for source in sources], dtype = np.int16)[order]
+        self.symbol_keys = [symbols[i].lower() for i in order]
+        postings = sorted(
+            (token, position)
+            for position, i in enumerate(order)
+            for token in set(search_tokens(texts[i])))
+        self.token_keys = [token for token, _ in postings]
+        self.token_positions = np.array([position for _, position in postings], dtype = np.int32)
+
+    @staticmethod
+    def prefix_range(keys, prefix):
+        return bisect_left(keys, prefix), bisect_left(keys, prefix + "\U0010ffff")
+
+    def search(self, query, sources = None, limit = SEARCH_LIMIT):
+        words = search_tokens(query)
+        if not words:
+            return []
+        #symbols starting with the query come first, then every entry matching all words by prefix
+        start, end = self.prefix_range(self.symbol_keys, query.strip().lower())
+        symbol_matches = np.arange(start, end, dtype = np.int32)
+        matches = None
+        for word in sorted(words, key = len, reverse = True):
+            start, end = self.prefix_range(self.token_keys, word)
+            found = np.unique(self.token_positions[start:end])
+            matches = found if matches is None else np.intersect1d(matches, found, assume_unique = True)
+            if len(matches) == 0:
+                break
+        positions = np.concatenate([symbol_matches, np.setdiff1d(matches, symbol_matches, assume_unique = True)])
+        if sources is not None:
+            codes = [code for code, source in enumerate(self.source_names) if source in sources]
+            positions = positions[np.isin(self.sources[positions], codes)]
+        results = []
+        for position in positions:
+            if self.labels[position] not in results:
+                results.append(self.labels[position])
+                if len(results) == limit:
+                    break
+        return results
+
+@st.cache_resource
+def symbol_search():
+    stocks = load_catalog("symbols")["data"].dropna(subset = ["options"])
+    binance_list = binance_symbols()
+    ccxt_list = ccxt_symbols()
+    return SymbolSearch(
+        symbols = stocks["symbol"].tolist() + binance_list + ccxt_list,
+        labels = stocks["options"].tolist() + binance_list + ccxt_list,
+        sources = stocks["market_name"].tolist() + ["BINANCE"] * len(binance_list) + ["CCXT"] * len(ccxt_list),
+        texts = stocks["options"].tolist() + binance_list + ccxt_list)
+
 def stocks_filter_func(
     periods_and_intervals, 
     page_title,
     filter_bar):
+    search_query = filter_bar.text_input(
+        label = "Search",
+        placeholder = "Symbol or name in all markets",
+        key = "stock_search"
+    )
     with filter_bar.form("market_form"):
         market_filter = st.selectbox(
             label = "Market",
             placeholder = "Market",
-            options = sorted([
-                market["market"].upper()
-                for market 
-                in json.load(open("./data/market_list.json", "r"))]),
+            options = market_options(),
             key = "market_filter"
         )
         market_button = st.form_submit_button(
@@ -252,23 +1115,29 @@ def stocks_filter_func(
         if market_button:
             market_filter = st.session_state["market_filter"]
     with filter_bar.form("search_form"):
-        market_data_yf = pd.json_normalize(
-                json.load(open(f"./data/symbols/{market_filter.lower()}.json", "r")))\
-                    .sort_values(by = "symbol")\
-                    .reset_index(drop = True)
-        market_data_yf["options"] = market_data_yf["symbol"] + " - " + market_data_yf["longName"] + " (" + market_data_yf["shortName"] + ")"
+        symbol_catalog = load_catalog("symbols")
+        stock_options = []
+        if search_query:
+            stock_options = symbol_search().search(
+                search_query, 
+                sources = symbol_catalog["groups"])
+        if stock_options:
+            stock_label = "Stock (search)"
+        else:
+            stock_label = f"Stock ({market_filter})"
+            stock_options = symbol_catalog["groups"][market_filter]
         element_filter = st.selectbox(
-            label = f"Stock ({market_filter})",
+            label = stock_label,
             placeholder = "Stock",
-            options = sorted(market_data_yf["options"][
-                market_data_yf["options"].notnull()]),
+            options = stock_options,
             key = "stock_filter"
         )
-        element = market_data_yf[market_data_yf["options"] == element_filter]["symbol"].iloc[0]
-        exchange = market_data_yf[market_data_yf["options"] == element_filter]["exchange"].iloc[0]
-        quote_type = market_data_yf[market_data_yf["options"] == element_filter]["quoteType"].iloc[0]
-        short_name = market_data_yf[market_data_yf["options"] == element_filter]["shortName"].iloc[0]
-        long_name = market_data_yf[market_data_yf["options"] == element_filter]["longName"].iloc[0]
+        selected = catalog_record(symbol_catalog, element_filter)
+        element = selected["symbol"]
+        exchange = selected["exchange"]
+        quote_type = selected["quoteType"]
+        short_name = selected["shortName"]
+        long_name = selected["longName"]
         period_filter = st.selectbox(
             label = "Period",
             placeholder = "Period",
@@ -311,10 +1180,7 @@ def indices_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    index_data = investpy.indices.get_indices()
-    index_data["options"] = index_data["symbol"] + " - " + index_data["name"]
-    index_data["country"] = index_data["country"].str.upper()
-    index_data["symbol_yf"] = "^" + index_data["symbol"]
+    index_catalog = load_catalog("indices")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -323,7 +1189,7 @@ def indices_filter_func(
             market_filter = st.selectbox(
                 label = "Market",
                 placeholder = "Market",
-                options = sorted(index_data["country"].unique()),
+                options = list(index_catalog["groups"]),
                 key = "market_filter"
             )
             market_button = st.form_submit_button(
@@ -333,18 +1199,18 @@ def indices_filter_func(
             if market_button:
                 market_filter = st.session_state["market_filter"]
         with st.form("search_form"):
-            index_options = index_data[
-                index_data["country"] == market_filter]["options"]
+            index_options = index_catalog["groups"][market_filter]
             index_filter = st.selectbox(
                 label = f"Index ({market_filter})",
                 placeholder = "Index",
-                options = sorted(index_options),
+                options = index_options,
                 key = "index_filter"
             )
-            index = index_data[index_data["options"] == index_filter]["symbol_yf"].tolist()[0]
-            exchange = index_data[index_data["options"] == index_filter]["symbol"].tolist()[0]
-            currency = index_data[index_data["options"] == index_filter]["currency"].tolist()[0]
-            long_name = index_data[index_data["symbol_yf"] == index]["full_name"].tolist()[0]
+            selected = catalog_record(index_catalog, index_filter)
+            index = selected["symbol_yf"]
+            exchange = selected["symbol"]
+            currency = selected["currency"]
+            long_name = selected["full_name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -386,8 +1252,7 @@ def bonds_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    bond_data = pd.read_json("./data/bonds.json")
-    bond_data["options"] = bond_data["Symbol"] + " - " + bond_data["Name"]
+    bond_catalog = load_catalog("bonds")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -396,11 +1261,12 @@ def bonds_filter_func(
             bond_filter = st.selectbox(
                 label = f"Index",
                 placeholder = "Index",
-                options = sorted(bond_data["options"]),
+                options = bond_catalog["options"],
                 key = "index_filter"
             )
-            bond = bond_data[bond_data["options"] == bond_filter]["Symbol"].tolist()[0]
-            long_name = bond_data[bond_data["Symbol"] == bond]["Name"].tolist()[0]
+            selected = catalog_record(bond_catalog, bond_filter)
+            bond = selected["Symbol"]
+            long_name = selected["Name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -440,8 +1306,7 @@ def commodities_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    commodity_data = pd.read_json("./data/commodities.json")
-    commodity_data["options"] = commodity_data["Symbol"] + " - " + commodity_data["Name"]
+    commodity_catalog = load_catalog("commodities")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -450,11 +1315,12 @@ def commodities_filter_func(
             commodity_filter = st.selectbox(
                 label = f"Commodity",
                 placeholder = "Commodity",
-                options = sorted(commodity_data["options"]),
+                options = commodity_catalog["options"],
                 key = "Commodity_filter"
             )
-            commodity = commodity_data[commodity_data["options"] == commodity_filter]["Symbol"].tolist()[0]
-            long_name = commodity_data[commodity_data["Symbol"] == commodity]["Name"].tolist()[0]
+            selected = catalog_record(commodity_catalog, commodity_filter)
+            commodity = selected["Symbol"]
+            long_name = selected["Name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -494,9 +1360,7 @@ def funds_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    funds_data = investpy.funds.get_funds()
-    funds_data["options"] = funds_data["symbol"] + " - " + funds_data["name"]
-    funds_data["country"] = funds_data["country"].str.upper()
+    fund_catalog = load_catalog("funds")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -505,7 +1369,7 @@ def funds_filter_func(
             market_filter = st.selectbox(
                 label = "Market",
                 placeholder = "Market",
-                options = sorted(funds_data["country"].unique()),
+                options = list(fund_catalog["groups"]),
                 key = "market_filter"
             )
             market_button = st.form_submit_button(
@@ -515,17 +1379,17 @@ def funds_filter_func(
             if market_button:
                 market_filter = st.session_state["market_filter"]
         with st.form("search_form"):
-            funds_options = funds_data[
-                funds_data["country"] == market_filter]["options"]
+            funds_options = fund_catalog["groups"][market_filter]
             fund_filter = st.selectbox(
                 label = f"Fund ({market_filter})",
                 placeholder = "Fund",
-                options = sorted(funds_options),
+                options = funds_options,
                 key = "fund_filter"
             )
-            fund = funds_data[funds_data["options"] == fund_filter]["symbol"].tolist()[0]
-            exchange = funds_data[funds_data["options"] == fund_filter]["symbol"].tolist()[0]
-            currency = funds_data[funds_data["options"] == fund_filter]["currency"].tolist()[0]
+            selected = catalog_record(fund_catalog, fund_filter)
+            fund = selected["symbol"]
+            exchange = selected["symbol"]
+            currency = selected["currency"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -566,9 +1430,7 @@ def etfs_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    etf_data = investpy.etfs.get_etfs()
-    etf_data["options"] = etf_data["symbol"] + " - " + etf_data["name"]
-    etf_data["country"] = etf_data["country"].str.upper()
+    etf_catalog = load_catalog("etfs")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -577,7 +1439,7 @@ def etfs_filter_func(
             market_filter = st.selectbox(
                 label = "Market",
                 placeholder = "Market",
-                options = sorted(etf_data["country"].unique()),
+                options = list(etf_catalog["groups"]),
                 key = "market_filter"
             )
             market_button = st.form_submit_button(
@@ -587,18 +1449,18 @@ def etfs_filter_func(
             if market_button:
                 market_filter = st.session_state["market_filter"]
         with st.form("search_form"):
-            etf_options = etf_data[
-                etf_data["country"] == market_filter]["options"]
+            etf_options = etf_catalog["groups"][market_filter]
             etf_filter = st.selectbox(
                 label = f"ETFs ({market_filter})",
                 placeholder = "ETFs",
-                options = sorted(etf_options),
+                options = etf_options,
                 key = "etf_filter"
             )
-            etf = etf_data[etf_data["options"] == etf_filter]["symbol"].tolist()[0]
-            exchange = etf_data[etf_data["options"] == etf_filter]["symbol"].tolist()[0]
-            currency = etf_data[etf_data["options"] == etf_filter]["currency"].tolist()[0]
-            long_name = etf_data[etf_data["symbol"] == etf]["full_name"].tolist()[0]
+            selected = catalog_record(etf_catalog, etf_filter)
+            etf = selected["symbol"]
+            exchange = selected["symbol"]
+            currency = selected["currency"]
+            long_name = selected["full_name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -640,23 +1502,23 @@ def currency_crosses_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    cc_data = investpy.currency_crosses.get_currency_crosses()
-    cc_data["symbol_yf"] = cc_data["base"] + cc_data["second"] + "=X"
+    cc_catalog = load_catalog("currency_crosses")
     with filter_bar.expander(
         label = "Market",
         expanded = True
     ):
         with st.form("search_form"):
-            cc_options = cc_data["full_name"].unique()
+            cc_options = cc_catalog["options"]
             cc_filter = st.selectbox(
                 label = f"Currency Cross",
                 placeholder = "Currency Cross",
-                options = sorted(cc_options),
+                options = cc_options,
                 key = "index_filter"
             )
-            cc = cc_data[cc_data["full_name"] == cc_filter]["symbol_yf"].tolist()[0]
-            currency = cc_data[cc_data["full_name"] == cc_filter]["name"].tolist()[0]
-            long_name = cc_data[cc_data["full_name"] == cc_filter]["full_name"].tolist()[0]
+            selected = catalog_record(cc_catalog, cc_filter)
+            cc = selected["symbol_yf"]
+            currency = selected["name"]
+            long_name = selected["full_name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -697,9 +1559,7 @@ def cryptos_filter_func(
     periods_and_intervals,
     page_title,
     filter_bar):
-    crypto_data = investpy.crypto.get_cryptos()
-    crypto_data["options"] = crypto_data["symbol"] + " - " + crypto_data["name"]
-    crypto_data["symbol_yf"] = crypto_data["symbol"] + "-" + crypto_data["currency"]
+    crypto_catalog = load_catalog("cryptos")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -708,12 +1568,13 @@ def cryptos_filter_func(
             crypto_filter = st.selectbox(
                 label = f"Cryptocurrency",
                 placeholder = "Cryptocurrency",
-                options = sorted(crypto_data["options"].unique()),
+                options = crypto_catalog["options"],
                 key = "crypto_filter"
             )
-            crypto = crypto_data[crypto_data["options"] == crypto_filter]["symbol_yf"].tolist()[0]
-            currency = crypto_data[crypto_data["options"] == crypto_filter]["currency"].tolist()[0]
-            long_name = crypto_data[crypto_data["symbol_yf"] == crypto]["name"].tolist()[0]
+            selected = catalog_record(crypto_catalog, crypto_filter)
+            crypto = selected["symbol_yf"]
+            currency = selected["currency"]
+            long_name = selected["name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -757,10 +1618,7 @@ def stocks_filter_func2(
         market_filter = st.selectbox(
             label = "Market",
             placeholder = "Market",
-            options = sorted([
-                market["market"].upper()
-                for market 
-                in json.load(open("./data/market_list.json", "r"))]),
+            options = market_options(),
             key = "market_filter2"
         )
         market_button = st.form_submit_button(
@@ -770,16 +1628,11 @@ def stocks_filter_func2(
         if market_button:
             market_filter = st.session_state["market_filter2"]
     with filter_bar.form("search_form2"):
-        market_data_yf = pd.json_normalize(
-                json.load(open(f"./data/symbols/{market_filter.lower()}.json", "r")))\
-                    .sort_values(by = "symbol")\
-                    .reset_index(drop = True)
-        market_data_yf["options"] = market_data_yf["symbol"] + " - " + market_data_yf["longName"] + " (" + market_data_yf["shortName"] + ")"
+        symbol_catalog = load_catalog("symbols")
         element_filter = st.multiselect(
             label = f"Stock ({market_filter})",
             placeholder = "Stock",
-            options = market_data_yf["options"][
-                market_data_yf["options"].notnull()],
+            options = symbol_catalog["groups"][market_filter],
             key = "stock_filter2"
         )
         feature_filter = st.selectbox(
@@ -793,11 +1646,12 @@ def stocks_filter_func2(
             ],
             index = 3,
             key = "feature_filter2")
-        element = market_data_yf[market_data_yf["options"].isin(element_filter)]["symbol"]
-        exchange = market_data_yf[market_data_yf["options"].isin(element_filter)]["exchange"]
-        quote_type = market_data_yf[market_data_yf["options"].isin(element_filter)]["quoteType"]
-        short_name = market_data_yf[market_data_yf["options"].isin(element_filter)]["shortName"]
-        long_name = market_data_yf[market_data_yf["options"].isin(element_filter)]["longName"]
+        selected = catalog_rows(symbol_catalog, element_filter)
+        element = selected["symbol"]
+        exchange = selected["exchange"]
+        quote_type = selected["quoteType"]
+        short_name = selected["shortName"]
+        long_name = selected["longName"]
         period_filter = st.selectbox(
             label = "Period",
             placeholder = "Period",
@@ -834,10 +1688,7 @@ def stocks_filter_func2(
 def indices_filter_func2(
     periods_and_intervals,
     filter_bar):
-    index_data = investpy.indices.get_indices()
-    index_data["options"] = index_data["symbol"] + " - " + index_data["name"]
-    index_data["country"] = index_data["country"].str.upper()
-    index_data["symbol_yf"] = "^" + index_data["symbol"]
+    index_catalog = load_catalog("indices")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -846,7 +1697,7 @@ def indices_filter_func2(
             market_filter = st.multiselect(
                 label = "Market",
                 placeholder = "Market",
-                options = sorted(index_data["country"].unique()),
+                options = list(index_catalog["groups"]),
                 #index = 91,
                 key = "market_filter"
             )
@@ -857,12 +1708,11 @@ def indices_filter_func2(
             if market_button:
                 market_filter = st.session_state["market_filter"]
         with st.form("search_form"):
-            index_options = index_data[
-                index_data["country"].isin(market_filter)]["options"]
+            index_options = group_options(index_catalog, market_filter)
             index_filter = st.multiselect(
                 label = f"Index",
                 placeholder = "Index",
-                options = sorted(index_options),
+                options = index_options,
                 #index = 1059,
                 key = "index_filter"
             )
@@ -877,10 +1727,11 @@ def indices_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            index = index_data[index_data["options"].isin(index_filter)]["symbol_yf"]
-            exchange = index_data[index_data["options"].isin(index_filter)]["symbol"]
-            currency = index_data[index_data["options"].isin(index_filter)]["currency"]
-            long_name = index_data[index_data["symbol_yf"].isin(index)]["full_name"]
+            selected = catalog_rows(index_catalog, index_filter)
+            index = selected["symbol_yf"]
+            exchange = selected["symbol"]
+            currency = selected["currency"]
+            long_name = selected["full_name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -916,9 +1767,7 @@ def indices_filter_func2(
 def cryptos_filter_func2(
     periods_and_intervals,
     filter_bar):
-    crypto_data = investpy.crypto.get_cryptos()
-    crypto_data["options"] = crypto_data["symbol"] + " - " + crypto_data["name"]
-    crypto_data["symbol_yf"] = crypto_data["symbol"] + "-" + crypto_data["currency"]
+    crypto_catalog = load_catalog("cryptos")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -927,7 +1776,7 @@ def cryptos_filter_func2(
             crypto_filter = st.multiselect(
                 label = f"Cryptocurrency",
                 placeholder = "Cryptocurrency",
-                options = sorted(crypto_data["options"].unique()),
+                options = crypto_catalog["options"],
                 key = "crypto_filter"
             )
             feature_filter = st.selectbox(
@@ -941,9 +1790,10 @@ def cryptos_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            crypto = crypto_data[crypto_data["options"].isin(crypto_filter)]["symbol_yf"]
-            currency = crypto_data[crypto_data["options"].isin(crypto_filter)]["currency"]
-            long_name = crypto_data[crypto_data["symbol_yf"].isin(crypto)]["name"]
+            selected = catalog_rows(crypto_catalog, crypto_filter)
+            crypto = selected["symbol_yf"]
+            currency = selected["currency"]
+            long_name = selected["name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -978,18 +1828,17 @@ def cryptos_filter_func2(
 def currency_crosses_filter_func2(
     periods_and_intervals,
     filter_bar):
-    cc_data = investpy.currency_crosses.get_currency_crosses()
-    cc_data["symbol_yf"] = cc_data["base"] + cc_data["second"] + "=X"
+    cc_catalog = load_catalog("currency_crosses")
     with filter_bar.expander(
         label = "Market",
         expanded = True
     ):
         with st.form("search_form"):
-            cc_options = cc_data["full_name"].unique()
+            cc_options = cc_catalog["options"]
             cc_filter = st.multiselect(
                 label = f"Currency Cross",
                 placeholder = "Currency Cross",
-                options = sorted(cc_options),
+                options = cc_options,
                 key = "index_filter"
             )
             feature_filter = st.selectbox(
@@ -1003,9 +1852,10 @@ def currency_crosses_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            cc = cc_data[cc_data["full_name"].isin(cc_filter)]["symbol_yf"]
-            currency = cc_data[cc_data["full_name"].isin(cc_filter)]["name"]
-            long_name = cc_data[cc_data["full_name"].isin(cc_filter)]["full_name"]
+            selected = catalog_rows(cc_catalog, cc_filter)
+            cc = selected["symbol_yf"]
+            currency = selected["name"]
+            long_name = selected["full_name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -1040,9 +1890,7 @@ def currency_crosses_filter_func2(
 def funds_filter_func2(
     periods_and_intervals,
     filter_bar):
-    funds_data = investpy.funds.get_funds()
-    funds_data["options"] = funds_data["symbol"] + " - " + funds_data["name"]
-    funds_data["country"] = funds_data["country"].str.upper()
+    fund_catalog = load_catalog("funds")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -1051,7 +1899,7 @@ def funds_filter_func2(
             market_filter = st.selectbox(
                 label = "Market",
                 placeholder = "Market",
-                options = sorted(funds_data["country"].unique()),
+                options = list(fund_catalog["groups"]),
                 index = 58,
                 key = "market_filter"
             )
@@ -1062,12 +1910,11 @@ def funds_filter_func2(
             if market_button:
                 market_filter = st.session_state["market_filter"]
         with st.form("search_form"):
-            funds_options = funds_data[
-                funds_data["country"] == market_filter]["options"]
+            funds_options = fund_catalog["groups"][market_filter]
             fund_filter = st.multiselect(
                 label = f"Fund ({market_filter})",
                 placeholder = "Fund",
-                options = sorted(funds_options),
+                options = funds_options,
                 key = "fund_filter"
             )
             feature_filter = st.selectbox(
@@ -1081,9 +1928,10 @@ def funds_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            fund = funds_data[funds_data["options"].isin(fund_filter)]["symbol"]
-            exchange = funds_data[funds_data["options"].isin(fund_filter)]["symbol"]
-            currency = funds_data[funds_data["options"].isin(fund_filter)]["currency"]
+            selected = catalog_rows(fund_catalog, fund_filter)
+            fund = selected["symbol"]
+            exchange = selected["symbol"]
+            currency = selected["currency"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -1118,9 +1966,7 @@ def funds_filter_func2(
 def etfs_filter_func2(
     periods_and_intervals,
     filter_bar):
-    etf_data = investpy.etfs.get_etfs()
-    etf_data["options"] = etf_data["symbol"] + " - " + etf_data["name"]
-    etf_data["country"] = etf_data["country"].str.upper()
+    etf_catalog = load_catalog("etfs")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -1129,7 +1975,7 @@ def etfs_filter_func2(
             market_filter = st.selectbox(
                 label = "Market",
                 placeholder = "Market",
-                options = sorted(etf_data["country"].unique()),
+                options = list(etf_catalog["groups"]),
                 index = 47,
                 key = "market_filter"
             )
@@ -1140,12 +1986,11 @@ def etfs_filter_func2(
             if market_button:
                 market_filter = st.session_state["market_filter"]
         with st.form("search_form"):
-            etf_options = etf_data[
-                etf_data["country"] == market_filter]["options"]
+            etf_options = etf_catalog["groups"][market_filter]
             etf_filter = st.multiselect(
                 label = f"ETFs ({market_filter})",
                 placeholder = "ETFs",
-                options = sorted(etf_options),
+                options = etf_options,
                 key = "etf_filter"
             )
             feature_filter = st.selectbox(
@@ -1159,10 +2004,11 @@ def etfs_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            etf = etf_data[etf_data["options"].isin(etf_filter)]["symbol"]
-            exchange = etf_data[etf_data["options"].isin(etf_filter)]["symbol"]
-            currency = etf_data[etf_data["options"].isin(etf_filter)]["currency"]
-            long_name = etf_data[etf_data["symbol"].isin(etf)]["full_name"]
+            selected = catalog_rows(etf_catalog, etf_filter)
+            etf = selected["symbol"]
+            exchange = selected["symbol"]
+            currency = selected["currency"]
+            long_name = selected["full_name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -1198,8 +2044,7 @@ def etfs_filter_func2(
 def bonds_filter_func2(
     periods_and_intervals,
     filter_bar):
-    bond_data = pd.read_json("./data/bonds.json")
-    bond_data["options"] = bond_data["Symbol"] + " - " + bond_data["Name"]
+    bond_catalog = load_catalog("bonds")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -1208,7 +2053,7 @@ def bonds_filter_func2(
             bond_filter = st.multiselect(
                 label = f"Index",
                 placeholder = "Index",
-                options = sorted(bond_data["options"]),
+                options = bond_catalog["options"],
                 key = "bond_filter"
             )
             feature_filter = st.selectbox(
@@ -1222,8 +2067,9 @@ def bonds_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            bond = bond_data[bond_data["options"].isin(bond_filter)]["Symbol"]
-            long_name = bond_data[bond_data["Symbol"].isin(bond)]["Name"]
+            selected = catalog_rows(bond_catalog, bond_filter)
+            bond = selected["Symbol"]
+            long_name = selected["Name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -1257,8 +2103,7 @@ def bonds_filter_func2(
 def commodities_filter_func2(
     periods_and_intervals,
     filter_bar):
-    commodity_data = pd.read_json("./data/commodities.json")
-    commodity_data["options"] = commodity_data["Symbol"] + " - " + commodity_data["Name"]
+    commodity_catalog = load_catalog("commodities")
     with filter_bar.expander(
         label = "Market",
         expanded = True
@@ -1267,7 +2112,7 @@ def commodities_filter_func2(
             commodity_filter = st.multiselect(
                 label = f"Commodity",
                 placeholder = "Commodity",
-                options = sorted(commodity_data["options"]),
+                options = commodity_catalog["options"],
                 key = "Commodity_filter"
             )
             feature_filter = st.selectbox(
@@ -1281,8 +2126,9 @@ def commodities_filter_func2(
                 ],
             index = 3,
             key = "feature_filter2")
-            commodity = commodity_data[commodity_data["options"].isin(commodity_filter)]["Symbol"]
-            long_name = commodity_data[commodity_data["Symbol"].isin(commodity)]["Name"]
+            selected = catalog_rows(commodity_catalog, commodity_filter)
+            commodity = selected["Symbol"]
+            long_name = selected["Name"]
             period_filter = st.selectbox(
                 label = "Period",
                 placeholder = "Period",
@@ -1318,10 +2164,22 @@ def binance_filter_func(filter_bar, _binance_symbols):
         label = "Cryptocurrencies",
         expanded = True
     ):
+        search_query = st.text_input(
+            label = "Search",
+            placeholder = "Symbol",
+            key = "binance_search")
+        symbol_options = []
+        if search_query:
+            symbol_options = symbol_search().search(search_query, sources = ["BINANCE"])
+        if symbol_options:
+            symbol_index = 0
+        else:
+            symbol_options = sorted(_binance_symbols)
+            symbol_index = symbol_options.index("BTCUSDT")
         symbol = st.selectbox(
             label = "Symbol",
-            options = sorted(_binance_symbols),
-            index = sorted(_binance_symbols).index("BTCUSDT"),
+            options = symbol_options,
+            index = symbol_index,
             key = "symbol1")
         feature = st.selectbox(
             label = "Feature",
@@ -1367,10 +2225,22 @@ def ccxt_filter_func(filter_bar, _ccxt_symbols):
         label = "Cryptocurrencies",
         expanded = True
     ):
+        search_query = st.text_input(
+            label = "Search",
+            placeholder = "Symbol",
+            key = "ccxt_search")
+        symbol_options = []
+        if search_query:
+            symbol_options = symbol_search().search(search_query, sources = ["CCXT"])
+        if symbol_options:
+            symbol_index = 0
+        else:
+            symbol_options = sorted(_ccxt_symbols)
+            symbol_index = symbol_options.index("BTC/USDT:USDT")
         symbol = st.selectbox(
             label = "Symbol",
-            options = sorted(_ccxt_symbols),
-            index = sorted(_ccxt_symbols).index("BTC/USDT:USDT"),
+            options = symbol_options,
+            index = symbol_index,
             key = "symbol1")
         feature = st.selectbox(
             label = "Feature",
@@ -1411,7 +2281,7 @@ def ccxt_filter_func(filter_bar, _ccxt_symbols):
             feature,
         )
     
-@st.cache_resource
+@bounded_cache()
 def get_binance_data(
     symbol,
     start_date,
@@ -1427,7 +2297,7 @@ def get_binance_data(
     )
     return data
 
-@st.cache_resource
+@bounded_cache()
 def get_ccxt_data(
     symbol,
     start_date,
@@ -1454,72 +2324,360 @@ def ccxt_symbols():
         symbols = json.load(f)
     return symbols
 
+SIMULATION_CHUNK_SIZE = 10 ** 4
+SIMULATION_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+SIMULATION_SAMPLE_PATHS = 10
+#log-price bins per time step used to estimate the quantiles without keeping every path
+SIMULATION_BINS = 1000
+
+def histogram_quantiles(counts, lower, width, quantiles):
+    #linear interpolation inside the bin where the cumulative count crosses each quantile
+    n = counts[0].sum()
+    cum_counts = np.cumsum(counts, axis = 1)
+    rows = np.arange(len(counts))
+    result = []
+    for q in quantiles:
+        k = np.minimum((cum_counts < q * n).sum(axis = 1), counts.shape[1] - 1)
+        below = np.where(k > 0, cum_counts[rows, k - 1], 0)
+        frac = (q * n - below) / np.maximum(counts[rows, k], 1)
+        result.append(lower + (k + np.clip(frac, 0, 1)) * width)
+    return np.stack(result, axis = 1)
+
+def simulate_paths(
+    log_increments,
+    s_0,
+    n_sims,
+    N,
+    random_seed = 42,
+    dtype = np.float32,
+    chunk_size = SIMULATION_CHUNK_SIZE,
+    n_bins = SIMULATION_BINS,
+    antithetic = True):
+    #log_increments(rng, shocks, sign) maps standard normal shocks of shape (size, N) to log increments,
+    #sign is -1 for the antithetic half, which gets the negated shocks and replays every other draw
+    #paths are generated chunk by chunk and reduced to running sums and per-step histograms of log(S_t / S_0)
+    rng = np.random.default_rng(random_seed)
+    price_sum = np.zeros(N + 1)
+    counts = np.zeros((N + 1, n_bins), dtype = np.int64)
+    offsets = np.arange(N + 1) * n_bins
+    started = time.perf_counter()
+    for chunk_start in range(0, n_sims, chunk_size):
+        size = min(chunk_size, n_sims - chunk_start)
+        if antithetic:
+            shocks = rng.standard_normal(size = ((size + 1) // 2, N), dtype = dtype)
+            state = rng.bit_generator.state
+            increments = log_increments(rng, shocks, 1)
+            rng.bit_generator.state = state
+            increments = np.concatenate([increments, log_increments(rng, -shocks, -1)])[:size]
+        else:
+            increments = log_increments(rng, rng.standard_normal(size = (size, N), dtype = dtype), 1)
+        log_paths = np.zeros((size, N + 1), dtype = dtype)
+        np.cumsum(increments, axis = 1, out = log_paths[:, 1:])
+        if chunk_start == 0:
+            samples = s_0 * np.exp(log_paths[:SIMULATION_SAMPLE_PATHS].astype(float))
+            #bin range per step from the first chunk, widened on both sides, outliers land in the edge bins
+            low, high = log_paths.min(axis = 0).astype(float), log_paths.max(axis = 0).astype(float)
+            span = np.maximum(high - low, 1e-9)
+            lower = low - span / 2
+            width = 2 * span / n_bins
+        bins = np.clip(((log_paths - lower.astype(dtype)) / width.astype(dtype)).astype(np.int32), 0, n_bins - 1)
+        counts += np.bincount((bins + offsets).ravel(), minlength = (N + 1) * n_bins).reshape(N + 1, n_bins)
+        price_sum += np.exp(log_paths).sum(axis = 0, dtype = float)
+    elapsed = time.perf_counter() - started
+    quantiles = s_0 * np.exp(histogram_quantiles(counts, lower, width, SIMULATION_QUANTILES))
+    terminal_edges = s_0 * np.exp(lower[-1] + width[-1] * np.arange(n_bins + 1))
+    return {
+        "mean": s_0 * price_sum / n_sims,
+        "quantiles": pd.DataFrame(quantiles, columns = SIMULATION_QUANTILES),
+        "terminal": (terminal_edges, counts[-1]),
+        "samples": samples,
+        "n_sims": n_sims,
+        "elapsed": elapsed,
+        "paths_per_second": n_sims / elapsed
+    }
+
+def fan_chart(simulation, index, actual = None, title = "Simulation's results"):
+    #a fixed number of traces whatever the number of simulated paths
+    quantiles = simulation["quantiles"].set_axis(index)
+    fig = go.Figure()
+    for i, path in enumerate(simulation["samples"]):
+        fig.add_trace(
+            go.Scatter(
+                x = index,
+                y = path,
+                mode = "lines",
+                line = dict(width = 1, color = "rgba(128, 128, 128, 0.4)"),
+                name = "Sample paths",
+                legendgroup = "samples",
+                showlegend = i == 0
+            )
+        )
+    for low, high, opacity in [(0.05, 0.95, 0.2), (0.25, 0.75, 0.4)]:
+        fig.add_trace(
+            go.Scatter(
+                x = index,
+                y = quantiles[high],
+                mode = "lines",
+                line = dict(width = 0),
+                showlegend = False,
+                hoverinfo = "skip"
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x = index,
+                y = quantiles[low],
+                mode = "lines",
+                line = dict(width = 0),
+                fill = "tonexty",
+                fillcolor = f"rgba(31, 119, 180, {opacity})",
+                name = f"P{round(low * 100)}-P{round(high * 100)}"
+            )
+        )
+    fig.add_trace(
+        go.Scatter(
+            x = index,
+            y = quantiles[0.5],
+            mode = "lines",
+            line = dict(color = "rgb(31, 119, 180)"),
+            name = "Median"
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x = index,
+            y = simulation["mean"],
+            mode = "lines",
+            line = dict(color = "red"),
+            name = "Simulation average"
+        )
+    )
+    if actual is not None:
+        fig.add_trace(
+            go.Scatter(
+                x = actual.index,
+                y = actual,
+                mode = "lines",
+                line = dict(color = "blue"),
+                name = actual.name
+            )
+        )
+    fig.update_layout(title = title)
+    return fig
+
 @st.cache_resource
-def simulate_gbm(s_0, mu, sigma, n_sims, T, N, random_seed = 42):
-    np.random.seed(random_seed)
+def simulate_gbm(
+    s_0, 
+    mu, 
+    sigma, 
+    n_sims, 
+    T, 
+    N, 
+    random_seed = 42, 
+    dtype = np.float32, 
+    chunk_size = SIMULATION_CHUNK_SIZE,
+    antithetic = True):
     dt = T / N
-    dW = np.random.normal(scale = np.sqrt(dt), size = (n_sims, N))
-    W = np.cumsum(dW, axis = 1)
-    time_step = np.linspace(dt, T, N)
-    time_steps = np.broadcast_to(time_step, (n_sims, N))
-    S_t = s_0 * np.exp((mu - 0.5 * sigma ** 2) * time_steps + sigma * W)
-    S_t = np.insert(S_t, 0, s_0, axis = 1)
-    return S_t
+    drift = (mu - 0.5 * sigma ** 2) * dt
+    def log_increments(rng, shocks, sign):
+        return drift + sigma * np.sqrt(dt) * shocks
+    return simulate_paths(
+        log_increments, 
+        s_0, 
+        n_sims, 
+        N, 
+        random_seed = random_seed, 
+        dtype = dtype, 
+        chunk_size = chunk_size,
+        antithetic = antithetic)
+
+def garch_simulation_parameters(state, scale = 100):
+    #GARCH(1,1) state from update_garch on returns in percent, rescaled to fractional returns,
+    #with the variance of the first simulated step forecast from the last bar of the state
+    params = state["params"]
+    return (
+        params["omega"] / scale ** 2, 
+        params["alpha[1]"], 
+        params["beta[1]"], 
+        garch_next_variance(state) / scale ** 2)
+
+@st.cache_resource
+def simulate_garch(
+    s_0,
+    mu,
+    omega,
+    alpha,
+    beta,
+    sigma2_0,
+    n_sims,
+    N,
+    random_seed = 42,
+    dtype = np.float32,
+    chunk_size = SIMULATION_CHUNK_SIZE,
+    antithetic = True):
+    def log_increments(rng, shocks, sign):
+        #vectorized over the paths, the variance recursion runs over the N steps
+        sigma2 = np.full(len(shocks), sigma2_0, dtype = dtype)
+        increments = np.empty_like(shocks)
+        for t in range(N):
+            eps = np.sqrt(sigma2) * shocks[:, t]
+            increments[:, t] = mu - 0.5 * sigma2 + eps
+            sigma2 = omega + alpha * eps ** 2 + beta * sigma2
+        return increments
+    return simulate_paths(
+        log_increments,
+        s_0,
+        n_sims,
+        N,
+        random_seed = random_seed,
+        dtype = dtype,
+        chunk_size = chunk_size,
+        antithetic = antithetic)
+
+@st.cache_resource
+def simulate_bootstrap(
+    s_0,
+    log_returns,
+    n_sims,
+    N,
+    block_size = 5,
+    random_seed = 42,
+    dtype = np.float32,
+    chunk_size = SIMULATION_CHUNK_SIZE):
+    #moving block bootstrap of historical log returns, without antithetic paths: mirroring the blocks
+    #would make the simulated returns symmetric and lose the historical skew
+    log_returns = np.asarray(log_returns, dtype = dtype)
+    block_size = min(block_size, len(log_returns))
+    n_blocks = -(-N // block_size)
+    offsets = np.arange(block_size)
+    def log_increments(rng, shocks, sign):
+        starts = rng.integers(0, len(log_returns) - block_size + 1, size = (len(shocks), n_blocks))
+        return log_returns[(starts[:, :, np.newaxis] + offsets).reshape(len(shocks), -1)[:, :N]]
+    return simulate_paths(
+        log_increments,
+        s_0,
+        n_sims,
+        N,
+        random_seed = random_seed,
+        dtype = dtype,
+        chunk_size = chunk_size,
+        antithetic = False)
+
+def jump_parameters(log_returns, threshold = 3):
+    #returns further than threshold standard deviations from the mean are taken as jumps
+    is_jump = (log_returns - log_returns.mean()).abs() > threshold * log_returns.std()
+    jumps = log_returns[is_jump]
+    return {
+        "sigma": log_returns[~is_jump].std(),
+        "jump_intensity": is_jump.mean(),
+        "jump_mean": jumps.mean() if len(jumps) > 0 else 0.0,
+        "jump_std": jumps.std() if len(jumps) > 1 else 0.0
+    }
+
+@st.cache_resource
+def simulate_jump_diffusion(
+    s_0,
+    mu,
+    sigma,
+    jump_intensity,
+    jump_mean,
+    jump_std,
+    n_sims,
+    T,
+    N,
+    random_seed = 42,
+    dtype = np.float32,
+    chunk_size = SIMULATION_CHUNK_SIZE,
+    antithetic = True):
+    #Merton jump diffusion, the drift is compensated so that the expected price grows at mu
+    dt = T / N
+    k = np.exp(jump_mean + 0.5 * jump_std ** 2) - 1
+    drift = (mu - 0.5 * sigma ** 2 - jump_intensity * k) * dt
+    def log_increments(rng, shocks, sign):
+        n_jumps = rng.poisson(jump_intensity * dt, size = shocks.shape)
+        jumps = n_jumps * jump_mean + np.sqrt(n_jumps) * jump_std * rng.standard_normal(size = shocks.shape, dtype = dtype)
+        return drift + sigma * np.sqrt(dt) * shocks + jumps
+    return simulate_paths(
+        log_increments,
+        s_0,
+        n_sims,
+        N,
+        random_seed = random_seed,
+        dtype = dtype,
+        chunk_size = chunk_size,
+        antithetic = antithetic)
+
+PORTFOLIO_CHUNK_SIZE = 10 ** 5
+#portfolios drawn in the scatter plot, the frontier itself is taken from every simulated portfolio
+PORTFOLIO_SCATTER_SIZE = 10 ** 5
+
+def simulate_portfolios(
+    avg_returns,
+    cov_mat,
+    n_portfolios,
+    n_points = 100,
+    chunk_size = PORTFOLIO_CHUNK_SIZE,
+    scatter_size = PORTFOLIO_SCATTER_SIZE,
+    dtype = np.float32,
+    random_seed = 42):
+    rng = np.random.default_rng(random_seed)
+    avg_returns = np.asarray(avg_returns, dtype = dtype)
+    cov_mat = np.asarray(cov_mat, dtype = dtype)
+    n_assets = len(avg_returns)
+    #every long-only portfolio return lies between the lowest and the highest asset return
+    bin_edges = np.linspace(avg_returns.min(), avg_returns.max(), n_points + 1)
+    ef_vol = np.full(n_points, np.inf, dtype = dtype)
+    ef_rtn = np.full(n_points, np.nan, dtype = dtype)
+    scatter = []
+    for chunk_start in range(0, n_portfolios, chunk_size):
+        size = min(chunk_size, n_portfolios - chunk_start)
+        weights = rng.random(size = (size, n_assets), dtype = dtype)
+        weights /= weights.sum(axis = 1, keepdims = True)
+        portf_rtns = weights @ avg_returns
+        portf_vol = np.sqrt(np.einsum("ij,ij->i", weights @ cov_mat, weights))
+        if chunk_start < scatter_size:
+            scatter.append((portf_rtns[:scatter_size - chunk_start], portf_vol[:scatter_size - chunk_start]))
+        #lowest volatility per return bin: sort by (bin, volatility) and keep the first row of each bin
+        bins = np.clip(np.searchsorted(bin_edges, portf_rtns, side = "right") - 1, 0, n_points - 1)
+        order = np.lexsort((portf_vol, bins))
+        chunk_bins, first = np.unique(bins[order], return_index = True)
+        chunk_min = order[first]
+        improved = portf_vol[chunk_min] < ef_vol[chunk_bins]
+        ef_vol[chunk_bins[improved]] = portf_vol[chunk_min[improved]]
+        ef_rtn[chunk_bins[improved]] = portf_rtns[chunk_min[improved]]
+    found = np.isfinite(ef_vol)
+    portf_rtns = np.concatenate([rtns for rtns, _ in scatter])
+    portf_vol = np.concatenate([vol for _, vol in scatter])
+    portf_results_df = pd.DataFrame(
+        {
+            "returns": portf_rtns,
+            "volatility": portf_vol,
+            "sharpe_ratio": portf_rtns / portf_vol
+        }
+    )
+    return portf_results_df, ef_rtn[found], ef_vol[found]
 
 @st.cache_data
-def efficient_frontier(multidata_yf, element, feature_filter):
+def efficient_frontier(
+    multidata_yf, 
+    element, 
+    feature_filter, 
+    n_portfolios = 10 ** 5, 
+    dtype = np.float32):
     import matplotlib.pyplot as plt
     from matplotlib.lines import Line2D
-    N_PORTFOLIOS = 10 ** 5
     N_DAYS = 252
     n_assets = len(element)
     returns_df = multidata_yf[feature_filter].pct_change().dropna()
     #annualized returns
     avg_returns = returns_df.mean() * N_DAYS
     cov_mat = returns_df.cov() * N_DAYS
-    #portfolio weights
-    np.random.seed(42)
-    weights = np.random.random(size = (N_PORTFOLIOS, n_assets))
-    weights /= np.sum(weights, axis = 1)[:, np.newaxis]
-    #portfolio metrics
-    portf_rtns = np.dot(weights, avg_returns)
-    portf_vol = []
-    for i in range(0, len(weights)):
-        vol = np.sqrt(
-            np.dot(
-                weights[i].T,
-                np.dot(cov_mat, weights[i])
-            )
-        )
-        portf_vol.append(vol)
-    portf_vol = np.array(portf_vol)
-    portf_sharpe_ratio = portf_rtns / portf_vol
-    portf_results_df = pd.DataFrame(
-        {
-            "returns": portf_rtns,
-            "volatility": portf_vol,
-            "sharpe_ratio": portf_sharpe_ratio
-        }
-    )
-    N_POINTS = 100
-    ef_rtn_list, ef_vol_list = [], []
-    possible_ef_rtns = np.linspace(
-        portf_results_df["returns"].min(),
-        portf_results_df["returns"].max(),
-        N_POINTS
-    )
-    #locate the points creating the efficient frontier
-    possible_ef_rtns = np.round(possible_ef_rtns, 2)
-    portf_rtns = np.round(portf_rtns, 2)
-    for rtn in possible_ef_rtns:
-        if rtn in portf_rtns:
-            ef_rtn_list.append(rtn)
-            matched_ind = np.where(portf_rtns == rtn)
-            ef_vol_list.append(
-                np.min(
-                    portf_vol[matched_ind]
-                )
-            )
+    #portfolio metrics and the points creating the efficient frontier
+    portf_results_df, ef_rtn_list, ef_vol_list = simulate_portfolios(
+        avg_returns.values,
+        cov_mat.values,
+        n_portfolios,
+        dtype = dtype)
     #plot the efficient frontier
     fig, ax = plt.subplots()
     portf_results_df.plot(
@@ -1547,22 +2705,12 @@ def efficient_frontier(multidata_yf, element, feature_filter):
     ax.legend()
     return ax.figure
 
-@st.cache_data
-def efficient_frontier2(
-    multidata_yf,
-    feature_filter,
-    element
-):
-    import matplotlib.pyplot as plt
-    from matplotlib.lines import Line2D
-    N_DAYS = 252
-    n_assets = len(element)
-    returns_df = multidata_yf[feature_filter].pct_change().dropna()
-    avg_returns = returns_df.mean() * N_DAYS
-    avg_returns = avg_returns.values
-    cov_mat = returns_df.cov() * N_DAYS
-    cov_mat = cov_mat.values
-    #optimization
+FRONTIER_TTL = 24 * 3600
+#allocations drawn in the risk-aversion bar plot, the frontier itself uses every gamma
+FRONTIER_BARS = 25
+
+def solve_frontier(avg_returns, cov_mat, gamma_range):
+    n_assets = len(avg_returns)
     weights = cp.Variable(n_assets)
     gamma_par = cp.Parameter(nonneg = True)
     portf_rtn_cvx = avg_returns @ weights
@@ -1574,19 +2722,64 @@ def efficient_frontier2(
         objective_function,
         [cp.sum(weights) == 1, weights >= 0]
     )
-    #efficient frontier
-    N_POINTS = 25
-    portf_rtn_cvx_ef, portf_vol_cvx_ef, weights_ef = [], [], []
-    gamma_range = np.logspace(-3, 3, num = N_POINTS)
+    portf_rtn_ef, portf_vol_ef, weights_ef, solve_times = [], [], [], []
     for gamma in gamma_range:
         gamma_par.value = gamma
+        started = time.perf_counter()
         problem.solve()
-        portf_vol_cvx_ef.append(cp.sqrt(portf_vol_cvx).value)
-        portf_rtn_cvx_ef.append(portf_rtn_cvx.value)
+        solve_times.append(time.perf_counter() - started)
+        portf_vol_ef.append(np.sqrt(portf_vol_cvx.value))
+        portf_rtn_ef.append(portf_rtn_cvx.value)
         weights_ef.append(weights.value)
+    return (
+        np.array(portf_rtn_ef, dtype = float),
+        np.array(portf_vol_ef, dtype = float),
+        np.array(weights_ef, dtype = float).reshape(len(gamma_range), n_assets),
+        np.array(solve_times)
+    )
+
+def frontier_sweep(avg_returns, cov_mat, gamma_range):
+    avg_returns = np.ascontiguousarray(avg_returns, dtype = float)
+    cov_mat = np.ascontiguousarray(cov_mat, dtype = float)
+    gamma_range = np.ascontiguousarray(gamma_range, dtype = float)
+    key = ("frontier_sweep", hashlib.sha1(
+        cov_mat.tobytes() + avg_returns.tobytes() + gamma_range.tobytes()).hexdigest())
+    hit, value = loaders_cache.get(key)
+    if hit:
+        return value
+    value = solve_frontier(avg_returns, cov_mat, gamma_range)
+    loaders_cache.put(key, value, FRONTIER_TTL)
+    return value
+
+@st.cache_data
+def efficient_frontier2(
+    multidata_yf,
+    feature_filter,
+    element,
+    n_points = 100
+):
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+    N_DAYS = 252
+    n_assets = len(element)
+    returns_df = multidata_yf[feature_filter].pct_change().dropna()
+    avg_returns = returns_df.mean() * N_DAYS
+    avg_returns = avg_returns.values
+    cov_mat = returns_df.cov() * N_DAYS
+    cov_mat = cov_mat.values
+    #efficient frontier
+    gamma_range = np.logspace(-3, 3, num = n_points)
+    portf_rtn_cvx_ef, portf_vol_cvx_ef, weights_ef, solve_times = frontier_sweep(
+        avg_returns,
+        cov_mat,
+        gamma_range)
+    timings_df = pd.DataFrame(
+        {"solve_time": solve_times}, 
+        index = pd.Index(np.round(gamma_range, 3), name = "gamma"))
     #risk aversion allocations plot
     weights_df = pd.DataFrame(weights_ef, columns = element, index = np.round(gamma_range, 3))
-    ax1 = weights_df.plot(kind = "bar", stacked = True)
+    bars = np.unique(np.linspace(0, n_points - 1, min(n_points, FRONTIER_BARS)).round().astype(int))
+    ax1 = weights_df.iloc[bars].plot(kind = "bar", stacked = True)
     ax1.set(
         title = "Weights allocation per risk-aversion level",
         xlabel = "$\\gamma$",
@@ -1610,55 +2803,668 @@ def efficient_frontier2(
         ylabel = "Expected Returns"
     )
     ax2.legend()
-    return ax1.figure, ax2.figure
+    return ax1.figure, ax2.figure, timings_df
+
+GARCH_FIT_TTL = 24 * 3600
+GARCH_WORKERS = os.cpu_count() or 1
+
+def data_fingerprint(data):
+    return hashlib.sha1(pd.util.hash_pandas_object(data, index = True).values.tobytes()).hexdigest()
+
+def fit_garch(returns):
+    model = arch_model(
+        returns,
+        mean = "constant",
+        vol = "GARCH",
+        p = 1,
+        q = 1
+    )
+    model = model.fit(
+        update_freq = 0,
+        disp = "off"
+    )
+    return (
+        model.params,
+        model.conditional_volatility,
+        model.std_resid,
+        model.forecast(horizon = 1).variance.iloc[-1, 0]
+    )
+
+def fit_garch_models(returns, n_workers = GARCH_WORKERS):
+    #one fit per column, reused while the column data is unchanged
+    return cached_map(
+        [("fit_garch", asset, data_fingerprint(returns[asset])) for asset in returns.columns],
+        fit_garch,
+        [(returns[asset],) for asset in returns.columns],
+        n_workers = n_workers)
+
+def cached_fit(key, fit, ttl = GARCH_FIT_TTL):
+    hit, value = loaders_cache.get(key)
+    if not hit:
+        value = single_flight(key, fit)
+        loaders_cache.put(key, value, ttl)
+    return value
+
+def cached_map(keys, fit, args, ttl = GARCH_FIT_TTL, n_workers = GARCH_WORKERS):
+    #fit(*args[i]) for every keys[i] missing from the cache, in a process pool when more than one is missing,
+    #so fit has to be a module-level function
+    values = [loaders_cache.get(key) for key in keys]
+    missing = [i for i, (hit, _) in enumerate(values) if not hit]
+    values = [value for _, value in values]
+    if len(missing) > 1 and n_workers > 1:
+        with ProcessPoolExecutor(max_workers = min(n_workers, len(missing))) as executor:
+            results = list(executor.map(fit, *zip(*[args[i] for i in missing])))
+    else:
+        results = [fit(*args[i]) for i in missing]
+    for i, result in zip(missing, results):
+        values[i] = result
+        loaders_cache.put(keys[i], result, ttl)
+    return values
+
+def garch_model_fit(symbol, returns, last_obs = None, **spec):
+    #fit once per (symbol, data fingerprint, model spec, last_obs), with last_obs resolved to the
+    #position it cuts the sample at so that any date between the same two bars reuses the fit.
+    #only the parts the page reads are cached, so that the cache can size them
+    from arch.utility.array import date_to_index
+    end = len(returns) if last_obs is None else date_to_index(last_obs, returns.index)
+    key = ("garch_model_fit", symbol, data_fingerprint(returns), tuple(sorted(spec.items())), end)
+
+    def fit():
+        fitted_model = arch_model(returns, **spec).fit(last_obs = last_obs, disp = "off")
+        return {
+            "params": fitted_model.params,
+            "resid": fitted_model.resid,
+            "conditional_volatility": fitted_model.conditional_volatility,
+            "summary": str(fitted_model.summary())
+        }
+
+    return cached_fit(key, fit)
+
+#new bars after which the parameters are re-estimated even without drift
+GARCH_REFIT_EVERY = 250
+#significance of the drift test on the squared standardized residuals of the new bars
+GARCH_DRIFT_LEVEL = 0.01
+
+garch_states = {}
+garch_locks = {}
+garch_states_lock = threading.Lock()
+
+def garch_key_lock(key):
+    #one lock per (symbol, spec), so that a fit for one key never blocks the others
+    with garch_states_lock:
+        return garch_locks.setdefault(key, threading.Lock())
+
+def check_garch_spec(spec):
+    #the variance recursion is written for ARCH(1) and GARCH(1,1) on a zero or constant mean
+    vol = spec.get("vol", "GARCH")
+    if (
+        spec.get("mean", "constant") not in ("zero", "constant")
+        or vol not in ("ARCH", "GARCH")
+        or spec.get("p", 1) != 1
+        or spec.get("o", 0) != 0
+        or (vol == "GARCH" and spec.get("q", 1) != 1)
+        or spec.get("power", 2.0) != 2.0):
+        raise ValueError(f"Incremental updates only support ARCH(1) and GARCH(1,1) models, got {spec}")
+
+def garch_state(symbol, returns, fit, reason, spec):
+    resid = fit["resid"].dropna()
+    cond_vol = fit["conditional_volatility"].dropna()
+    z2 = (resid / cond_vol) ** 2
+    return {
+        "symbol": symbol,
+        "spec": spec,
+        "summary": fit["summary"],
+        "params": fit["params"],
+        "index": returns.index[-1],
+        "returns": returns,
+        "resid": resid.iloc[-1],
+        "sigma2": cond_vol.iloc[-1] ** 2,
+        "conditional_volatility": cond_vol,
+        "z2_std": z2.std(),
+        "bars_since_refit": 0,
+        "refit_reason": reason,
+        "drift_pvalue": None
+    }
+
+def garch_recursion(state, new_returns):
+    #sigma2_t = omega + alpha * eps_{t-1} ** 2 + beta * sigma2_{t-1}, only over the new bars
+    params = state["params"]
+    omega, alpha, beta = params["omega"], params["alpha[1]"], params.get("beta[1]", 0.0)
+    resid = new_returns.values - params.get("mu", 0.0)
+    eps, sigma2 = state["resid"], state["sigma2"]
+    sigma2_path = np.empty(len(resid))
+    for t in range(len(resid)):
+        sigma2 = omega + alpha * eps ** 2 + beta * sigma2
+        eps = resid[t]
+        sigma2_path[t] = sigma2
+    return resid, sigma2_path
+
+def garch_extend(state, new_returns, resid, sigma2_path, **changes):
+    return dict(
+        state,
+        index = new_returns.index[-1],
+        resid = resid[-1],
+        sigma2 = sigma2_path[-1],
+        conditional_volatility = pd.concat([
+            state["conditional_volatility"],
+            pd.Series(np.sqrt(sigma2_path), index = new_returns.index)]),
+        **changes)
+
+def garch_state_valid(state, returns):
+    #the state still describes the sample if its returns are unchanged where they overlap, the sample
+    #does not reach further back than the fit, and its start moved forward no more than the bars added since
+    stored = state["returns"]
+    if state["index"] not in returns.index or returns.index[0] < stored.index[0]:
+        return False
+    dropped = stored.index.searchsorted(returns.index[0])
+    added = state["bars_since_refit"] + int((returns.index > state["index"]).sum())
+    overlap = returns.loc[:state["index"]]
+    return (
+        dropped <= added
+        and overlap.index.equals(stored.index[dropped:])
+        and np.array_equal(overlap.values, stored.values[dropped:]))
+
+def update_garch(
+    symbol,
+    returns,
+    refit_every = GARCH_REFIT_EVERY,
+    drift_level = GARCH_DRIFT_LEVEL,
+    **spec):
+    #keeps the last fitted parameters and variance state per (symbol, spec) and only runs the variance
+    #recursion over the bars added since, refitting on schedule, on drift or when the sample changed.
+    #symbol is any hashable key, callers add the interval to it so that each interval keeps its own state.
+    #the last bar may still be open and revised by the next refresh: the stored state stops one bar
+    #short of it and the returned state filters it on top, without storing it
+    from scipy.stats import norm
+    check_garch_spec(spec)
+    key = (symbol, tuple(sorted(spec.items())))
+    settled, provisional = returns.iloc[:-1], returns.iloc[-1:]
+    with garch_key_lock(key):
+        state = garch_states.get(key)
+        if state is None or not garch_state_valid(state, settled):
+            state = garch_state(symbol, settled, garch_model_fit(symbol, settled, **spec), "initial fit", spec)
+        else:
+            new_returns = settled.loc[settled.index > state["index"]]
+            if len(new_returns) > 0:
+                resid, sigma2_path = garch_recursion(state, new_returns)
+                #the mean squared standardized residual of the new bars should stay around its in-sample value of 1
+                z2 = resid ** 2 / sigma2_path
+                drift_stat = (z2.mean() - 1) / (state["z2_std"] / np.sqrt(len(z2)))
+                drift_pvalue = 2 * norm.sf(abs(drift_stat))
+                bars_since_refit = state["bars_since_refit"] + len(new_returns)
+                if bars_since_refit >= refit_every or drift_pvalue < drift_level:
+                    reason = "scheduled refit" if bars_since_refit >= refit_every else "drift refit"
+                    state = garch_state(symbol, settled, garch_model_fit(symbol, settled, **spec), reason, spec)
+                else:
+                    state = garch_extend(
+                        state,
+                        new_returns,
+                        resid,
+                        sigma2_path,
+                        returns = pd.concat([state["returns"], new_returns]),
+                        bars_since_refit = bars_since_refit,
+                        refit_reason = "incremental update")
+                state["drift_pvalue"] = drift_pvalue
+        garch_states[key] = state
+    resid, sigma2_path = garch_recursion(state, provisional)
+    return garch_extend(state, provisional, resid, sigma2_path)
+
+def garch_next_variance(state):
+    params = state["params"]
+    return params["omega"] + params["alpha[1]"] * state["resid"] ** 2 + params.get("beta[1]", 0.0) * state["sigma2"]
+
+def garch_fixed_model(state, returns):
+    #the parameters of the state applied to the given returns, a filter pass without estimation
+    return arch_model(returns, **state["spec"]).fix(state["params"])
+
+def garch_forecast_model(key, returns, last_obs, **spec):
+    #parameters estimated on the returns before last_obs, carried forward incrementally as last_obs moves,
+    #and applied to every return so that forecasts can start at last_obs
+    from arch.utility.array import date_to_index
+    state = update_garch(key, returns.iloc[:date_to_index(last_obs, returns.index)], **spec)
+    return garch_fixed_model(state, returns)
+
+#rows of the correlation matrices computed at once, bounds the float64 working set to T x DCC_BLOCK_ROWS x N
+DCC_BLOCK_ROWS = 16
+
+def dcc_diagonal(std_resids, a, b, Q_bar):
+    #the diagonal of Q_t follows the same recursion and is needed to normalize every block
+    from scipy.signal import lfilter
+    x = (1 - a - b) * np.diag(Q_bar) + a * std_resids[:-1] ** 2
+    q_diag = lfilter([1], [1, -b], x, axis = 0, zi = b * np.diag(Q_bar)[np.newaxis])[0]
+    return np.vstack([np.diag(Q_bar)[np.newaxis], q_diag])
+
+def dcc_recursion(std_resids, a, b, out, block_rows = DCC_BLOCK_ROWS):
+    #Q_t = (1 - a - b) Q_bar + a z_{t-1} z_{t-1}' + b Q_{t-1}, Q_0 = Q_bar, is linear in Q_{t-1} and elementwise,
+    #so it is run as an IIR filter over time for a block of rows at a time, writing R_t into out
+    from scipy.signal import lfilter
+    T, N = std_resids.shape
+    Q_bar = std_resids.T @ std_resids / T
+    q_sqrt = np.sqrt(dcc_diagonal(std_resids, a, b, Q_bar))
+    Q_last = np.empty((N, N))
+    for i in range(0, N, block_rows):
+        rows = slice(i, min(i + block_rows, N))
+        x = (1 - a - b) * Q_bar[rows] + a * std_resids[:-1, rows, np.newaxis] * std_resids[:-1, np.newaxis, :]
+        Q = lfilter([1], [1, -b], x, axis = 0, zi = b * Q_bar[np.newaxis, rows])[0]
+        Q = np.concatenate([Q_bar[np.newaxis, rows], Q])
+        Q_last[rows] = Q[-1]
+        out[:, rows] = Q / (q_sqrt[:, rows, np.newaxis] * q_sqrt[:, np.newaxis, :])
+    return Q_bar, Q_last
+
+#bytes of float64 working set per block of time steps in the likelihood
+DCC_BLOCK_BYTES = 64 * 1024 ** 2
+
+def dcc_neg_loglikelihood(params, std_resids, block_bytes = DCC_BLOCK_BYTES):
+    #Q_t is filtered over blocks of time steps, carrying Q_{t-1} between them through lfilter's zi,
+    #so that only one block of the T x N x N path is ever held
+    from scipy.signal import lfilter
+    a, b = params
+    if a + b >= 1:
+        return np.inf
+    T, N = std_resids.shape
+    Q_bar = std_resids.T @ std_resids / T
+    #x, Q, R and the solve result of a block
+    block_steps = max(1, block_bytes // (4 * 8 * N * N))
+    Q_prev = Q_bar
+    total = 0.0
+    for t0 in range(0, T, block_steps):
+        t1 = min(t0 + block_steps, T)
+        z_lag = std_resids[max(t0, 1) - 1:t1 - 1]
+        x = (1 - a - b) * Q_bar + a * z_lag[:, :, np.newaxis] * z_lag[:, np.newaxis, :]
+        Q = lfilter([1], [1, -b], x, axis = 0, zi = b * Q_prev[np.newaxis])[0]
+        if t0 == 0:
+            Q = np.concatenate([Q_bar[np.newaxis], Q])
+        Q_prev = Q[-1]
+        q_sqrt = np.sqrt(np.diagonal(Q, axis1 = 1, axis2 = 2))
+        R = Q / (q_sqrt[:, :, np.newaxis] * q_sqrt[:, np.newaxis, :])
+        z = std_resids[t0:t1]
+        _, logdet = np.linalg.slogdet(R)
+        quad = np.einsum("ti,ti->t", z, np.linalg.solve(R, z[..., np.newaxis])[..., 0])
+        total += np.sum(logdet + quad)
+    return 0.5 * total
+
+def dcc_garch(std_resids, dtype = np.float32, memmap_path = None):
+    from scipy.optimize import minimize
+    Z = np.asarray(std_resids, dtype = float)
+    T, N = Z.shape
+    result = minimize(
+        dcc_neg_loglikelihood,
+        x0 = [0.05, 0.90],
+        args = (Z,),
+        method = "SLSQP",
+        bounds = [(1e-6, 1), (1e-6, 1)],
+        constraints = [{"type": "ineq", "fun": lambda params: 0.9999 - params[0] - params[1]}])
+    a, b = result.x
+    #full T x N x N path of conditional correlations, on disk for large N
+    if memmap_path is None:
+        R = np.empty((T, N, N), dtype = dtype)
+    else:
+        R = np.lib.format.open_memmap(memmap_path, mode = "w+", dtype = dtype, shape = (T, N, N))
+    Q_bar, Q_last = dcc_recursion(Z, a, b, R)
+    Q_next = (1 - a - b) * Q_bar + a * np.outer(Z[-1], Z[-1]) + b * Q_last
+    q_sqrt = np.sqrt(np.diag(Q_next))
+    return {
+        "a": a,
+        "b": b,
+        "R": R,
+        "R_forecast": Q_next / np.outer(q_sqrt, q_sqrt)
+    }
 
 @st.cache_data
 def conditional_correlation_matrix(returns, element_filter):
-    coeffs, cond_vol, std_resids, models = [], [], [], []
     with st.spinner(
         text = "Loading GARCH models"
     ):
-        for asset in returns.columns:
-            model = arch_model(
-                returns[asset],
-                mean = "constant",
-                vol = "GARCH",
-                p = 1,
-                q = 1
-            )
-            model = model.fit(
-                update_freq = 0,
-                disp = "off"
-            )
-            coeffs.append(model.params)
-            cond_vol.append(model.conditional_volatility)
-            std_resids.append(model.std_resid)
-            models.append(model)
-        coeffs_df = pd.DataFrame(coeffs, index = returns.columns)
-        cond_vol_df = pd.DataFrame(cond_vol).transpose().set_axis(returns.columns, axis = "columns")
-        std_resids_df = pd.DataFrame(std_resids).transpose().set_axis(returns.columns, axis = "columns")
-        #CONDITIONAL CORRELATION MATRIX (R)
-        R = std_resids_df.transpose().dot(std_resids_df).div(len(std_resids_df))
-        diag = []
+        fits = fit_garch_models(returns)
+        coeffs_df = pd.DataFrame([fit[0] for fit in fits], index = returns.columns)
+        cond_vol_df = pd.concat([fit[1] for fit in fits], axis = 1).set_axis(returns.columns, axis = "columns")
+        std_resids_df = pd.concat([fit[2] for fit in fits], axis = 1).set_axis(returns.columns, axis = "columns")
+        #DCC CONDITIONAL CORRELATION MATRIX (R), one-step forecast
+        dcc = dcc_garch(std_resids_df.values)
+        R = pd.DataFrame(dcc["R_forecast"], columns = returns.columns, index = returns.columns)
+        #obtain volatility from the one-step variance forecasts
+        diag = np.sqrt([fit[3] for fit in fits])
         D = np.zeros((len(element_filter), len(element_filter)))
-        for model in models:
-            diag.append(
-                model.forecast(horizon = 1).variance.iloc[-1, 0]
-            )
-        #obtain volatility from variance
-        diag = np.sqrt(diag)
         np.fill_diagonal(D, diag)
         #calculate the conditional covariance matrix
         D_R = np.matmul(D, R.values)
         H = np.matmul(D_R, D)
         H = pd.DataFrame(H, columns = returns.columns, index = returns.columns)
+        #average pairwise conditional correlation over time
+        n_assets = len(returns.columns)
+        avg_corr = (dcc["R"].sum(axis = (1, 2), dtype = float) - n_assets) / max(n_assets * (n_assets - 1), 1)
+        avg_corr = pd.Series(avg_corr, index = std_resids_df.index, name = "average_correlation")
     #st.write(H)
     fig = px.imshow(
         H,
         text_auto = True,
         aspect = "auto",
         color_continuous_scale = "RdBu_r")
-    return fig
+    fig2 = px.line(
+        avg_corr,
+        title = f"Average DCC correlation (a = {dcc['a']:.3f}, b = {dcc['b']:.3f})")
+    return fig, fig2
+
+#FORECASTING
+FORECAST_TEST_LENGTH = 15
+FORECAST_SEASONAL_PERIODS = 12
+FORECAST_TTL = 24 * 3600
+FORECAST_WORKERS = os.cpu_count() or 1
+#name: (family, label, model, model kwargs, fit kwargs), the ARIMA candidates are fitted on the log of the feature
+FORECAST_CANDIDATES = {
+    "ses_1": ("Simple Exponential Smoothing", "SES (smoothing level = 0.5)", SimpleExpSmoothing, {}, {"smoothing_level": 0.5}),
+    "ses_2": ("Simple Exponential Smoothing", "SES", SimpleExpSmoothing, {}, {}),
+    "hs_1": ("Holt's model", "Holt's model with linear trend", Holt, {}, {}),
+    "hs_2": ("Holt's model", "Holt's model with exponential trend", Holt, {"exponential": True}, {}),
+    "hs_3": ("Holt's model", "Holt's model with exponential trend and damping", Holt, {"exponential": False, "damped_trend": True}, {}),
+    "hw_1": (
+        "Holt-Winters' Triple Exponential Smoothing",
+        "Holt-Winters' model with exponential trend",
+        ExponentialSmoothing,
+        {"trend": "mul", "seasonal": "add", "seasonal_periods": FORECAST_SEASONAL_PERIODS},
+        {}),
+    "hw_2": (
+        "Holt-Winters' Triple Exponential Smoothing",
+        "Holt-Winters' model with exponential trend and damping",
+        ExponentialSmoothing,
+        {"trend": "mul", "seasonal": "add", "seasonal_periods": FORECAST_SEASONAL_PERIODS, "damped_trend": True},
+        {}),
+    "arima_111": ("ARIMA", "ARIMA(1,1,1)", ARIMA, {"order": (1, 1, 1)}, {}),
+    "arima_212": ("ARIMA", "ARIMA(2,1,2)", ARIMA, {"order": (2, 1, 2)}, {}),
+}
+
+def fit_forecast(model, model_kwargs, fit_kwargs, label, series, test_length):
+    train, test = series.iloc[:-test_length], series.iloc[-test_length:]
+    log = model is ARIMA
+    try:
+        fitted_model = model(np.log(train) if log else train, **model_kwargs).fit(**fit_kwargs)
+        prediction = np.concatenate([fitted_model.fittedvalues, fitted_model.forecast(test_length)])
+        if log:
+            prediction = np.exp(prediction)
+        prediction = pd.Series(prediction, index = series.index, name = label)
+        #the summary text instead of the results object, which holds the whole state space and is never sized by the cache
+        return {
+            "summary": str(fitted_model.summary()),
+            "prediction": prediction,
+            "mape": mean_absolute_percentage_error(test, prediction.iloc[-test_length:]),
+            "aic": fitted_model.aic,
+            "error": None
+        }
+    except Exception as e:
+        return {
+            "summary": None,
+            "prediction": None,
+            "mape": np.nan,
+            "aic": np.nan,
+            "error": str(e)
+        }
+
+def fit_forecast_candidate(name, series, test_length):
+    family, label, model, model_kwargs, fit_kwargs = FORECAST_CANDIDATES[name]
+    return fit_forecast(model, model_kwargs, fit_kwargs, label, series, test_length)
+
+def forecast_leaderboard(
+    symbol, 
+    series, 
+    test_length = FORECAST_TEST_LENGTH, 
+    candidates = None, 
+    n_workers = FORECAST_WORKERS):
+    #every candidate fitted once per (symbol, feature, data fingerprint, holdout), the missing ones in a process pool
+    names = list(candidates or FORECAST_CANDIDATES)
+    fingerprint = data_fingerprint(series)
+    fits = cached_map(
+        [("forecast_fit", symbol, series.name, fingerprint, test_length, name) for name in names],
+        fit_forecast_candidate,
+        [(name, series, test_length) for name in names],
+        ttl = FORECAST_TTL,
+        n_workers = n_workers)
+    fits = dict(zip(names, fits))
+    leaderboard = pd.DataFrame(
+        [
+            {
+                "Model": FORECAST_CANDIDATES[name][1],
+                "Family": FORECAST_CANDIDATES[name][0],
+                "MAPE": fit["mape"],
+                "AIC": fit["aic"],
+                "Error": fit["error"]
+            } 
+            for name, fit in fits.items()
+        ],
+        index = pd.Index(names, name = "Candidate")
+    ).sort_values("MAPE", na_position = "last")
+    return fits, leaderboard
+
+#AUTO ARIMA
+ARIMA_MAX_P = 4
+ARIMA_MAX_Q = 4
+ARIMA_MAX_D = 2
+#significance of the ADF and KPSS tests used to choose d
+ARIMA_TEST_LEVEL = 0.05
+ARIMA_IC = "aic"
+#an order is only fitted next to an already fitted one whose information criterion is within this margin of the best
+ARIMA_IC_MARGIN = 2
+#waves of growing p + q without improving the best information criterion before the search stops
+ARIMA_PATIENCE = 1
+ARIMA_MAX_FITS = 25
+
+def arima_differencing(series, max_d = ARIMA_MAX_D, level = ARIMA_TEST_LEVEL):
+    #differences while both tests agree on a unit root: ADF does not reject it and KPSS rejects stationarity
+    values = series.dropna().values
+    for d in range(max_d):
+        diffed = np.diff(values, n = d)
+        if adfuller(diffed, autolag = "AIC")[1] < level or kpss(diffed, regression = "c", nlags = "auto")[1] >= level:
+            return d
+    return max_d
+
+def fit_arima_order(series, order, ic):
+    try:
+        return getattr(ARIMA(series, order = order).fit(), ic)
+    except Exception:
+        return np.nan
+
+def arima_order_search(
+    series,
+    d,
+    max_p = ARIMA_MAX_P,
+    max_q = ARIMA_MAX_Q,
+    ic = ARIMA_IC,
+    margin = ARIMA_IC_MARGIN,
+    patience = ARIMA_PATIENCE,
+    max_fits = ARIMA_MAX_FITS,
+    n_workers = FORECAST_WORKERS):
+    #orders are fitted in waves of equal p + q, each wave in parallel
+    results = {}
+    waves = {}
+    best_ic, best_order = np.inf, None
+    stale_waves = 0
+    stop = "grid exhausted"
+    executor = ProcessPoolExecutor(max_workers = n_workers) if n_workers > 1 else None
+    try:
+        for k in range(max_p + max_q + 1):
+            wave = [(p, k - p) for p in range(max(0, k - max_q), min(k, max_p) + 1)]
+            if k > 0:
+                wave = [
+                    (p, q) for p, q in wave
+                    if any(results.get(parent, np.inf) <= best_ic + margin for parent in ((p - 1, q), (p, q - 1)))
+                ]
+            if not wave:
+                stop = "pruned"
+                break
+            if len(results) + len(wave) > max_fits:
+                wave = wave[:max_fits - len(results)]
+                stop = "fit budget"
+            orders = [(p, d, q) for p, q in wave]
+            if executor is not None and len(orders) > 1:
+                values = list(executor.map(fit_arima_order, [series] * len(orders), orders, [ic] * len(orders)))
+            else:
+                values = [fit_arima_order(series, order, ic) for order in orders]
+            improved = False
+            for (p, q), value in zip(wave, values):
+                results[(p, q)] = value
+                waves[(p, q)] = k
+                if value < best_ic:
+                    best_ic, best_order = value, (p, d, q)
+                    improved = True
+            stale_waves = 0 if improved else stale_waves + 1
+            if stop == "fit budget":
+                break
+            if stale_waves >= patience:
+                stop = "early stopping"
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    search = pd.DataFrame(
+        [(p, d, q, waves[(p, q)], value) for (p, q), value in results.items()],
+        columns = ["p", "d", "q", "wave", ic.upper()]
+    ).sort_values(ic.upper(), na_position = "last").reset_index(drop = True)
+    return best_order, search, stop
+
+def auto_arima(
+    symbol,
+    series,
+    test_length = FORECAST_TEST_LENGTH,
+    max_p = ARIMA_MAX_P,
+    max_q = ARIMA_MAX_Q,
+    ic = ARIMA_IC,
+    max_fits = ARIMA_MAX_FITS,
+    n_workers = FORECAST_WORKERS):
+    #order searched on the log of the training part, the winner is cached per symbol and refitted for the holdout forecast
+    key = ("auto_arima", symbol, series.name, data_fingerprint(series), test_length, max_p, max_q, ic, max_fits)
+
+    def fit():
+        start = time.perf_counter()
+        train = np.log(series.iloc[:-test_length])
+        d = arima_differencing(train)
+        order, search, stop = arima_order_search(
+            train,
+            d,
+            max_p = max_p,
+            max_q = max_q,
+            ic = ic,
+            max_fits = max_fits,
+            n_workers = n_workers)
+        if order is None:
+            raise ValueError("No ARIMA order could be fitted.")
+        label = f"ARIMA({order[0]},{order[1]},{order[2]})"
+        return {
+            "order": order,
+            "d": d,
+            "fit": fit_forecast(ARIMA, {"order": order}, {}, label, series, test_length),
+            "search": search,
+            "n_fits": len(search),
+            "n_grid": (max_p + 1) * (max_q + 1),
+            "stop": stop,
+            "wall_time": time.perf_counter() - start
+        }
+
+    return cached_fit(key, fit, FORECAST_TTL)
+
+#ROLLING-ORIGIN BACKTEST
+BACKTEST_ORIGINS = 250
+BACKTEST_HORIZON = FORECAST_TEST_LENGTH
+#origins between two full estimations, the fitted state is carried forward with fixed parameters in between
+BACKTEST_REFIT_EVERY = 25
+
+def forecast_refilter(fitted_model, model, model_kwargs, train):
+    #reruns the smoothing recursions over the longer sample with the estimated parameters and initial states
+    fitted = fitted_model.model
+    params = fitted_model.params
+    initial = {"initial_level": params["initial_level"]}
+    fit_kwargs = {"smoothing_level": params["smoothing_level"], "optimized": False}
+    if fitted.has_trend:
+        initial["initial_trend"] = params["initial_trend"]
+        #statsmodels reports b0 ** phi / phi as the initial multiplicative damped trend
+        if fitted.damped_trend and fitted.trend == "mul":
+            initial["initial_trend"] = (params["initial_trend"] * params["damping_trend"]) ** (1 / params["damping_trend"])
+        fit_kwargs["smoothing_trend"] = params["smoothing_trend"]
+    if fitted.damped_trend:
+        fit_kwargs["damping_trend"] = params["damping_trend"]
+    if fitted.has_seasonal:
+        initial["initial_seasonal"] = params["initial_seasons"]
+        fit_kwargs["smoothing_seasonal"] = params["smoothing_seasonal"]
+    return model(train, **dict(model_kwargs, initialization_method = "known"), **initial).fit(**fit_kwargs)
+
+def backtest_fold(name, series, origins, horizon, refit_every):
+    #one full fit at the first origin of the fold and every refit_every origins, ARIMA states are extended
+    #with the new observations and the exponential smoothing ones refiltered in between
+    #plain arrays skip the date index handling, which costs more than the state update itself
+    family, label, model, model_kwargs, fit_kwargs = FORECAST_CANDIDATES[name]
+    log = model is ARIMA
+    values = np.log(series.values) if log else series.values
+    rows = []
+    fitted_model = None
+    last_origin = None
+    for i, origin in enumerate(origins):
+        refit = fitted_model is None or i % refit_every == 0
+        try:
+            if refit:
+                fitted_model = model(values[:origin], **model_kwargs).fit(**fit_kwargs)
+            elif log:
+                fitted_model = fitted_model.extend(values[last_origin:origin])
+            else:
+                fitted_model = forecast_refilter(fitted_model, model, model_kwargs, values[:origin])
+            last_origin = origin
+            forecast = np.asarray(fitted_model.forecast(horizon))
+        except Exception:
+            fitted_model = None
+            forecast = np.full(horizon, np.nan)
+        if log:
+            forecast = np.exp(forecast)
+        actual = series.values[origin:origin + horizon]
+        ape = np.abs((actual - forecast) / actual)
+        rows.append({
+            "Origin": series.index[origin],
+            "Candidate": name,
+            "Refit": refit,
+            "MAPE": ape.mean(),
+            **{f"h{h + 1}": ape[h] for h in range(horizon)}
+        })
+    return rows
+
+def forecast_backtest(
+    symbol,
+    series,
+    candidates = None,
+    n_origins = BACKTEST_ORIGINS,
+    horizon = BACKTEST_HORIZON,
+    refit_every = BACKTEST_REFIT_EVERY,
+    n_workers = FORECAST_WORKERS):
+    #walk-forward evaluation over the last n_origins origins, split in folds aligned on the refit schedule so that
+    #running them in parallel does not add full fits, and cached per candidate and fold like the leaderboard fits
+    names = list(FORECAST_CANDIDATES if candidates is None else candidates)
+    start = max(len(series) - horizon - n_origins + 1, 2 * FORECAST_SEASONAL_PERIODS)
+    origins = list(range(start, len(series) - horizon + 1))
+    if not origins:
+        raise ValueError("Not enough data for the backtest.")
+    fold_size = refit_every * max(1, -(-len(origins) // (refit_every * n_workers)))
+    folds = [origins[i:i + fold_size] for i in range(0, len(origins), fold_size)]
+    fingerprint = data_fingerprint(series)
+    tasks = [(name, fold) for name in names for fold in folds]
+    started = time.perf_counter()
+    fold_rows = cached_map(
+        [
+            ("forecast_backtest", symbol, series.name, fingerprint, fold[0], fold[-1], horizon, refit_every, name) 
+            for name, fold in tasks
+        ],
+        backtest_fold,
+        [(name, series, fold, horizon, refit_every) for name, fold in tasks],
+        ttl = FORECAST_TTL,
+        n_workers = n_workers)
+    wall_time = time.perf_counter() - started
+    errors = pd.DataFrame([row for rows in fold_rows for row in rows])
+    summary = errors.groupby("Candidate").agg(
+        **{
+            "Mean MAPE": ("MAPE", "mean"),
+            "Median MAPE": ("MAPE", "median"),
+            "90% MAPE": ("MAPE", lambda mape: mape.quantile(0.9)),
+            "Origins": ("MAPE", "count"),
+            "Full fits": ("Refit", "sum")
+        }
+    ).reindex(names)
+    summary.insert(0, "Model", [FORECAST_CANDIDATES[name][1] for name in names])
+    summary = summary.sort_values("Mean MAPE", na_position = "last")
+    return errors, summary, wall_time
 
 def image_border_radius(image_path, border_radius, width, height, page_object = None, is_html = False):
     if is_html == False:
@@ -1771,4 +3577,7 @@ def simulate_best_params(price, best_fast_windows, best_slow_windows, **kwargs):
     entries = fast_ma.ma_crossed_above(slow_ma)
     exits = fast_ma.ma_crossed_below(slow_ma)
     pf = vbt.Portfolio.from_signals(price, entries, exits, **kwargs)
-    return pf.sharpe_ratio()
\ No newline at end of file
+    return pf.sharpe_ratio()
+if __name__ == "__main__":
+    for name in sys.argv[1:] or CATALOGS:
+        refresh_catalog(name)
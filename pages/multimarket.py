@@ -16,6 +16,7 @@ from streamlit_extras.metric_cards import style_metric_cards
 #internal functions
 from functions import (
     get_multimarket,
+    get_multimarket_news,
     get_news,
     page_buttons,
     option_menu,
@@ -181,27 +182,19 @@ main_tabs = display.tabs([
         "$$\\textbf{NEWS}$$"
 ])
 
-try:
-    (
-        tickers_yf,
-        multidata_yf
-    ) = get_multimarket(
-        element,
-        periods_and_intervals[0]["period"][period_filter], 
-        periods_and_intervals[1]["interval"][interval_filter],
-        "YFinance"
-    )
-    (
-        tickers_yq,
-        multidata_yq
-    ) = get_multimarket(
-        element,
-        periods_and_intervals[0]["period"][period_filter], 
-        periods_and_intervals[1]["interval"][interval_filter],
-        "YahooQuery"
-    )
-except:
-    pass
+(
+    multidata_yf,
+    multidata_errors
+) = get_multimarket(
+    element,
+    periods_and_intervals[0]["period"][period_filter], 
+    periods_and_intervals[1]["interval"][interval_filter],
+    "YFinance"
+)
+if multidata_errors:
+    st.warning(
+        "Could not load " + ", ".join(
+            f"{ticker} ({error})" for ticker, error in multidata_errors.items()))
 
 with main_tabs[0]: #COMPARISON TAB
     grid1 = grid([3, 3], [3, 3], vertical_align = True)
@@ -264,10 +257,13 @@ with main_tabs[1]: #VOLATILITY TAB
             st.plotly_chart(fig)
         with cols[1]:
             st.write("$$\\huge{\\textbf{Conditional Correlation Matrix}}$$")
-            fig3 = conditional_correlation_matrix(returns, element_filter)
+            fig3, fig4 = conditional_correlation_matrix(returns, element_filter)
             st.plotly_chart(
                 fig3,
                 use_container_width = True)
+            st.plotly_chart(
+                fig4,
+                use_container_width = True)
     except:
         st.write("No informations.")
 with main_tabs[2]: #ASSET ALLOCATION TAB
@@ -325,7 +321,7 @@ with main_tabs[2]: #ASSET ALLOCATION TAB
     with tabs[2]:
         st.write("$$\\underline{\\huge{\\textbf{Efficient Frontier \& Risk Aversion}}}$$")
         try:
-            fig1, fig2 = efficient_frontier2(multidata_yf, feature_filter, element)
+            fig1, fig2, timings_df = efficient_frontier2(multidata_yf, feature_filter, element)
             st.write("$$\\Large{\\textbf{Risk-Aversion Allocation}}$$")
             st.pyplot(
                 fig1,
@@ -336,16 +332,23 @@ with main_tabs[2]: #ASSET ALLOCATION TAB
                 fig2,
                 use_container_width = True
             )
+            st.write("$$\\Large{\\textbf{Solver Timings}}$$")
+            st.write(f"{len(timings_df)} solves in {timings_df['solve_time'].sum():.3f}s")
+            st.dataframe(
+                timings_df,
+                use_container_width = True
+            )
         except:
             st.write("No informations.")
 with main_tabs[3]: #NEWS TAB
     st.write("$$\\underline{\\huge{\\textbf{Latest News}}}$$")
     try:
+        news = get_multimarket_news(element.tolist())
         subtabs = st.tabs(element.tolist())
         for i, x in enumerate(element.tolist()):
             with subtabs[i]:
                 try:
-                    get_news(tickers_yf.news()[x])
+                    get_news(news[x])
                 except:
                     st.write("No informations.")
     except:
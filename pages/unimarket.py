@@ -11,6 +11,7 @@ from streamlit_extras.metric_cards import style_metric_cards
 #internal functions
 from functions import (
     get_unimarket,
+    prefetch_modules,
     page_buttons,
     indicator_metrics,
     general_indicator_metrics,
@@ -27,6 +28,10 @@ from functions import (
     bonds_filter_func,
     commodities_filter_func,
     split_key_name,
+    chart_prep,
+    chart_window,
+    downsample_ohlc,
+    downsample_line,
     image_border_radius)
 
 PAGE_TITLE = "COELHO Finance | UNIMARKET"
@@ -175,20 +180,11 @@ else:
 
 (
     ticker_yf, 
+    ticker_yq,
     data_yf) = get_unimarket(
         element, 
         periods_and_intervals[0]["period"][period_filter], 
-        periods_and_intervals[1]["interval"][interval_filter],
-        "YFinance")
-
-(
-    ticker_yq,
-    data_yq
-) = get_unimarket(
-    element,
-    periods_and_intervals[0]["period"][period_filter], 
-    periods_and_intervals[1]["interval"][interval_filter],
-    "YahooQuery")
+        periods_and_intervals[1]["interval"][interval_filter])
 
 #if asset_filter == "Stocks":
 #    currency = ticker_yf.info["currency"]
@@ -214,29 +210,33 @@ with main_tabs[0]: #UNIMARKET TAB
         try:
             checkboxes_grid = grid(5, vertical_align = True)
             checkboxes_grid.markdown("**OHLC filters**")
+            #charts drawn from the zoom window, downsampled to about the chart width
+            window_yf = data_yf[chart_window(st, data_yf.index, key = "chart_window")]
+            chart_yf = downsample_ohlc(window_yf)
             fig = go.Figure()
             fig.add_trace(
                 go.Candlestick(
-                    x = data_yf.index,
-                    open = data_yf["Open"],
-                    high = data_yf["High"],
-                    low = data_yf["Low"],
-                    close = data_yf["Close"],
+                    x = chart_yf.index,
+                    open = chart_yf["Open"],
+                    high = chart_yf["High"],
+                    low = chart_yf["Low"],
+                    close = chart_yf["Close"],
                 )
             )
             for x in ["Open", "High", "Low", "Close"]:
                 if checkboxes_grid.checkbox(x):
+                    line = downsample_line(window_yf[x])
                     fig.add_trace(
                         go.Scatter(
-                            x = data_yf.index,
-                            y = data_yf[x],
+                            x = line.index,
+                            y = line,
                             mode = "lines",
                             name = x
                         )
                     )
             fig2 = px.bar(
-                x = data_yf.index,
-                y = data_yf["Volume"]
+                x = chart_yf.index,
+                y = chart_yf["Volume"]
             )
             fig.update_layout(
                 xaxis_rangeslider_visible = False,
@@ -252,25 +252,16 @@ with main_tabs[0]: #UNIMARKET TAB
                 title = "Volume",
                 showlegend = False
             )
+            chart = chart_prep(chart_yf, window_yf.index)
             fig2.update_traces(
-                marker_color = [
-                    '#FF0000' 
-                    if row['Open'] - row['Close'] >= 0
-                    else '#00FF00' 
-                    for index, row in data_yf.iterrows()]
+                marker_color = chart["volume_colors"]
             )
             # removing all empty dates
-            # build complete timeline from start date to end date
-            dt_all = pd.date_range(start = data_yf.index[0], end = data_yf.index[-1])
-            # retrieve the dates that ARE in the original datset
-            dt_obs = [d.strftime("%Y-%m-%d") for d in pd.to_datetime(data_yf.index)]
-            # define dates with missing values
-            dt_breaks = [d for d in dt_all.strftime("%Y-%m-%d").tolist() if not d in dt_obs]
             fig.update_xaxes(
-                rangebreaks=[dict(values=dt_breaks)],
+                rangebreaks = chart["rangebreaks"],
                 automargin = False)
             fig2.update_xaxes(
-                rangebreaks=[dict(values=dt_breaks)])
+                rangebreaks = chart["rangebreaks"])
             fig.layout.title = element_filter
             st.plotly_chart(
                 fig,
@@ -329,6 +320,51 @@ with main_tabs[0]: #UNIMARKET TAB
 #                use_container_width = True)
 #        except:
 #            st.write("No informations.")
+#modules read by the INDICATORS, NEWS, FINANCIAL and TECHNICAL INSIGHTS tabs, fetched once the chart is drawn
+if asset_filter == "Stocks":
+    prefetch_modules(
+        element,
+        ticker_yf,
+        ticker_yq,
+        yf_modules = [
+            "news",
+            "financials",
+            "quarterly_financials",
+            "income_stmt",
+            "balance_sheet",
+            "quarterly_balance_sheet",
+            "cash_flow",
+            "quarterly_cash_flow",
+            "major_holders",
+            "institutional_holders",
+            "mutualfund_holders",
+            "earnings_dates",
+            "get_shares_full",
+            "dividends",
+            "capital_gains",
+            "splits",
+            "actions"
+        ],
+        yq_modules = [
+            "recommendations",
+            "financial_data",
+            "income_statement",
+            "balance_sheet",
+            "cash_flow",
+            "insider_holders",
+            "insider_transactions",
+            "major_holders",
+            "earning_history",
+            "earnings",
+            "earnings_trend",
+            "valuation_measures",
+            "index_trend",
+            "recommendation_trend",
+            "option_chain",
+            "calendar_events",
+            "corporate_events",
+            "technical_insights"
+        ])
 with main_tabs[1]: #INDICATORS TAB
     subtab_names = [
         #"$$\\textbf{Main Indicators}$$",
@@ -1026,10 +1062,10 @@ with main_tabs[3]: #FINANCIAL TAB
             with subtabs[i]:
                 st.write("$$\\underline{\\huge{\\textbf{" + attr.replace('_', ' ').capitalize() + "}}}$$")
                 try:
-                    st.dataframe(ticker_yf.__getattribute__(attr)())
+                    st.dataframe(getattr(ticker_yf, attr)())
                 except:
                     try:
-                        st.dataframe(ticker_yf.__getattribute__(attr))
+                        st.dataframe(getattr(ticker_yf, attr))
                     except:
                         st.write("No informations.")
     with subtabs_[9]:
@@ -8,7 +8,6 @@ import plotly.graph_objects as go
 import plotly.express as px
 import pandas_ta as ta
 import ruptures as rpt
-from arch import arch_model
 from plotly.subplots import make_subplots
 from streamlit_extras.switch_page_button import switch_page
 #FORECAST MODELS
@@ -17,15 +16,8 @@ from statsmodels.tsa.seasonal import (
     seasonal_decompose,
     STL
 )
-from statsmodels.tsa.holtwinters import (
-    ExponentialSmoothing,
-    SimpleExpSmoothing,
-    Holt
-)
-from statsmodels.tsa.arima.model import ARIMA
 from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
 from statsmodels.tsa.stattools import adfuller, kpss
-from sklearn.metrics import mean_absolute_percentage_error
 #ANOMALY DETECTION MODEL
 from adtk.data import validate_series
 from adtk.detector import (
@@ -51,7 +43,31 @@ from functions import (
     cryptos_filter_func,
     bonds_filter_func,
     commodities_filter_func,
+    update_garch,
+    garch_next_variance,
+    garch_fixed_model,
+    garch_forecast_model,
     simulate_gbm,
+    garch_simulation_parameters,
+    simulate_garch,
+    simulate_bootstrap,
+    jump_parameters,
+    simulate_jump_diffusion,
+    fan_chart,
+    forecast_leaderboard,
+    FORECAST_CANDIDATES,
+    auto_arima,
+    ARIMA_MAX_P,
+    ARIMA_MAX_Q,
+    ARIMA_MAX_FITS,
+    forecast_backtest,
+    BACKTEST_ORIGINS,
+    BACKTEST_HORIZON,
+    BACKTEST_REFIT_EVERY,
+    chart_prep,
+    chart_window,
+    downsample_ohlc,
+    downsample_line,
     image_border_radius)
 
 PAGE_TITLE = "COELHO Finance | UNISTATS"
@@ -227,23 +243,27 @@ with main_tabs[0]: #UNIMARKET TAB
     try:
         checkboxes_grid = grid(9, vertical_align = True)
         checkboxes_grid.markdown("**OHLC filters**")
+        #charts drawn from the zoom window, downsampled to about the chart width
+        window_mask = chart_window(st, data_yf.index, key = "chart_window")
+        chart_yf = downsample_ohlc(data_yf[window_mask])
         fig = go.Figure()
         if checkboxes_grid.checkbox("OHLC", value = True):
             fig.add_trace(
                 go.Candlestick(
-                    x = data_yf.index,
-                    open = data_yf["Open"],
-                    high = data_yf["High"],
-                    low = data_yf["Low"],
-                    close = data_yf["Close"],
+                    x = chart_yf.index,
+                    open = chart_yf["Open"],
+                    high = chart_yf["High"],
+                    low = chart_yf["Low"],
+                    close = chart_yf["Close"],
                 )
             )
         for x in ["Open", "High", "Low", "Close", "Volume", "Adj Close"]:
             if checkboxes_grid.checkbox(x):
+                line = downsample_line(data_yf.loc[window_mask, x])
                 fig.add_trace(
                     go.Scatter(
-                        x = data_yf.index,
-                        y = data_yf[x],
+                        x = line.index,
+                        y = line,
                         mode = "lines",
                         name = x
                     )
@@ -262,17 +282,18 @@ with main_tabs[0]: #UNIMARKET TAB
         data_yf["EMA"] = data_yf["Close"].ewm(span = ma_window, adjust = False).mean()
         for x in ["SMA", "EMA"]:
             if ma_grid.checkbox(x, value = True):
+                line = downsample_line(data_yf.loc[window_mask, x])
                 fig.add_trace(
                     go.Scatter(
-                        x = data_yf.index,
-                        y = data_yf[x],
+                        x = line.index,
+                        y = line,
                         mode = "lines",
                         name = x
                     )
                 )
         fig2 = px.bar(
-            x = data_yf.index,
-            y = data_yf["Volume"]
+            x = chart_yf.index,
+            y = chart_yf["Volume"]
         )
         fig.update_layout(
             height = 500,
@@ -288,25 +309,16 @@ with main_tabs[0]: #UNIMARKET TAB
             title = "Volume",
             showlegend = False
         )
+        chart = chart_prep(chart_yf, data_yf.index[window_mask])
         fig2.update_traces(
-            marker_color = [
-                '#FF0000' 
-                if row['Open'] - row['Close'] >= 0
-                else '#00FF00' 
-                for index, row in data_yf.iterrows()]
+            marker_color = chart["volume_colors"]
         )
         # removing all empty dates
-        # build complete timeline from start date to end date
-        dt_all = pd.date_range(start = data_yf.index[0], end = data_yf.index[-1])
-        # retrieve the dates that ARE in the original datset
-        dt_obs = [d.strftime("%Y-%m-%d") for d in pd.to_datetime(data_yf.index)]
-        # define dates with missing values
-        dt_breaks = [d for d in dt_all.strftime("%Y-%m-%d").tolist() if not d in dt_obs]
         fig.update_xaxes(
-            rangebreaks=[dict(values=dt_breaks)],
+            rangebreaks = chart["rangebreaks"],
             automargin = False)
         fig2.update_xaxes(
-            rangebreaks=[dict(values=dt_breaks)])
+            rangebreaks = chart["rangebreaks"])
         fig.layout.title = element_filter
         st.plotly_chart(
             fig,
@@ -719,6 +731,7 @@ with main_tabs[2]: #FORECAST TAB
         "$$\\textbf{Stationarity}$$",
         "$$\\textbf{Exponential Smoothing}$$",
         "$$\\textbf{ARIMA}$$",
+        "$$\\textbf{Backtest}$$",
     ])
     with tabs[0]:
         st.write("$$\\underline{\\huge{\\textbf{Seasonal Decomposition}}}$$")
@@ -882,68 +895,18 @@ with main_tabs[2]: #FORECAST TAB
             key = "feature3"
         )
         try:
-            if model_filter == "Simple Exponential Smoothing":
-                ses_1 = SimpleExpSmoothing(data_train[feature]).fit(smoothing_level = 0.5)
-                ses_forecast_1 = ses_1.forecast(TEST_LENGTH)
-                ses_2 = SimpleExpSmoothing(data_train[feature]).fit()
-                ses_forecast_2 = ses_2.forecast(TEST_LENGTH)
-                ses_data = pd.DataFrame()
-                ses_data["ses_1"] = ses_1.fittedvalues.tolist() + ses_forecast_1.tolist()
-                ses_data["ses_2"] = ses_2.fittedvalues.tolist() + ses_forecast_2.tolist()
-                ses_data.index = data_yf2.index
-                opt_alpha = ses_2.model.params["smoothing_level"]
-                fig = go.Figure()
-                fig.add_trace(
-                    go.Scatter(
-                        x = data_yf2.index,
-                        y = data_yf2[feature],
-                        mode = "lines",
-                        name = feature
-                    )
-                )
-                fig.add_trace(
-                    go.Scatter(
-                        x = ses_data.index,
-                        y = ses_data["ses_1"],
-                        mode = "lines",
-                        name = "SES",
-                        line = {
-                                "dash": "dash",
-                                "color": "blue"
-                            }
-                    )
-                )
-                fig.add_trace(
-                    go.Scatter(
-                        x = ses_data.index,
-                        y = ses_data["ses_1"],
-                        mode = "lines",
-                        name = "SES (smoothing level = 0.5)",
-                        line = {
-                                "dash": "dash",
-                                "color": "red"
-                            }
-                    )
-                )
-                st.plotly_chart(
-                    fig,
-                    use_container_width = True
+            with st.spinner(
+                text = "Fitting forecast models"
+            ):
+                forecasts, leaderboard = forecast_leaderboard(
+                    element,
+                    data_yf2[feature],
+                    TEST_LENGTH
                 )
-            elif model_filter == "Holt's model":
-                #Holt's model with linear trend
-                hs_1 = Holt(data_train[feature]).fit()
-                hs_forecast_1 = hs_1.forecast(TEST_LENGTH)
-                #Holt's model with exponential trend
-                hs_2 = Holt(data_train[feature], exponential = True).fit()
-                hs_forecast_2 = hs_2.forecast(TEST_LENGTH)
-                #Holt's model with exponential trend and damping
-                hs_3 = Holt(data_train[feature], exponential = False, damped_trend = True).fit()
-                hs_forecast_3 = hs_3.forecast(TEST_LENGTH)
-                holt_data = pd.DataFrame()
-                holt_data["hs_1"] = hs_1.fittedvalues.tolist() + hs_forecast_1.tolist()
-                holt_data["hs_2"] = hs_2.fittedvalues.tolist() + hs_forecast_2.tolist()
-                holt_data["hs_3"] = hs_3.fittedvalues.tolist() + hs_forecast_3.tolist()
-                holt_data.index = data_yf2.index
+            candidates = leaderboard[(leaderboard["Family"] == model_filter) & leaderboard["Error"].isna()]
+            if candidates.empty:
+                st.error("Not enough data to process. Choose another financial asset.")
+            else:
                 fig = go.Figure()
                 fig.add_trace(
                     go.Scatter(
@@ -953,111 +916,44 @@ with main_tabs[2]: #FORECAST TAB
                         name = feature
                     )
                 )
-                fig.add_trace(
-                    go.Scatter(
-                        x = holt_data.index,
-                        y = holt_data["hs_1"],
-                        mode = "lines",
-                        name = "Holt's model with linear trend",
-                        line = {
-                                "dash": "dash",
-                                "color": "blue"
-                            }
-                    )
-                )
-                fig.add_trace(
-                    go.Scatter(
-                        x = holt_data.index,
-                        y = holt_data["hs_2"],
-                        mode = "lines",
-                        name = "Holt's model with exponential trend",
-                        line = {
-                                "dash": "dash",
-                                "color": "red"
-                            }
-                    )
-                )
-                fig.add_trace(
-                    go.Scatter(
-                        x = holt_data.index,
-                        y = holt_data["hs_2"],
-                        mode = "lines",
-                        name = "Holt's model with exponential trend and damping",
-                        line = {
-                                "dash": "dash",
-                                "color": "green"
-                            }
+                for candidate, color in zip(candidates.index, ["blue", "red", "green"]):
+                    fig.add_trace(
+                        go.Scatter(
+                            x = data_yf2.index,
+                            y = forecasts[candidate]["prediction"],
+                            mode = "lines",
+                            name = candidates.loc[candidate, "Model"],
+                            line = {
+                                    "dash": "dash",
+                                    "color": color
+                                }
+                        )
                     )
-                )
-                st.plotly_chart(
+                grid2 = grid([4, 1], vertical_align = True)
+                container = grid2.container()
+                container.plotly_chart(
                     fig,
                     use_container_width = True
                 )
-            elif model_filter == "Holt-Winters' Triple Exponential Smoothing":
-                SEASONAL_PERIODS = 12
-                #Holt-Winters' model with exponential trend
-                hw_1 = ExponentialSmoothing(
-                    data_train[feature],
-                    trend = "mul",
-                    seasonal = "add",
-                    seasonal_periods = SEASONAL_PERIODS
-                ).fit()
-                hw_forecast_1 = hw_1.forecast(TEST_LENGTH)
-                #Holt-Winters' model with exponential trend and damping
-                hw_2 = ExponentialSmoothing(
-                    data_train[feature],
-                    trend = "mul",
-                    seasonal = "add",
-                    seasonal_periods = SEASONAL_PERIODS,
-                    damped_trend = True
-                ).fit()
-                hw_forecast_2 = hw_2.forecast(TEST_LENGTH)
-                hw_data = pd.DataFrame()
-                hw_data["hw_1"] = hw_1.fittedvalues.tolist() + hw_forecast_1.tolist()
-                hw_data["hw_2"] = hw_2.fittedvalues.tolist() + hw_forecast_2.tolist()
-                hw_data.index = data_yf2.index
-                fig = go.Figure()
-                fig.add_trace(
-                    go.Scatter(
-                        x = data_yf2.index,
-                        y = data_yf2[feature],
-                        mode = "lines",
-                        name = feature
-                    )
-                )
-                fig.add_trace(
-                    go.Scatter(
-                        x = hw_data.index,
-                        y = hw_data["hw_1"],
-                        mode = "lines",
-                        name = "Holt-Winters' model with exponential trend",
-                        line = {
-                                "dash": "dash",
-                                "color": "blue"
-                            }
-                    )
-                )
-                fig.add_trace(
-                    go.Scatter(
-                        x = hw_data.index,
-                        y = hw_data["hw_2"],
-                        mode = "lines",
-                        name = "Holt-Winters' model with exponential trend and damping",
-                        line = {
-                                "dash": "dash",
-                                "color": "red"
-                            }
+                container2 = grid2.container()
+                container2.write("### **Mean Absolute Percentage Error (MAPE)**")
+                for candidate in candidates.index:
+                    container2.metric(
+                        label = candidates.loc[candidate, "Model"],
+                        value = f"{100 * candidates.loc[candidate, 'MAPE']:.2f}%"
                     )
-                )
-                st.plotly_chart(
-                    fig,
+            with st.expander(
+                label = "Leaderboard - Holdout MAPE"
+            ):
+                st.dataframe(
+                    leaderboard,
                     use_container_width = True
                 )
         except:
             st.error("Not enough data to process. Choose another financial asset.")
     with tabs[3]:
         st.write("$$\\underline{\\huge{\\textbf{ARIMA}}}$$")
-        grid1 = grid(1, vertical_align = True)
+        grid1 = grid(3, vertical_align = True)
         feature = grid1.selectbox(
             label = "Feature",
             options = [
@@ -1071,6 +967,16 @@ with main_tabs[2]: #FORECAST TAB
             index = 4,
             key = "feature4"
         )
+        max_fits = grid1.number_input(
+            label = "Auto-ARIMA fit budget",
+            min_value = 1,
+            max_value = (ARIMA_MAX_P + 1) * (ARIMA_MAX_Q + 1),
+            value = ARIMA_MAX_FITS,
+            step = 1
+        )
+        auto_order = grid1.toggle(
+            label = "Auto-ARIMA order search"
+        )
         try:
             with st.expander(
                 label = "Stationary feature"
@@ -1150,32 +1056,67 @@ with main_tabs[2]: #FORECAST TAB
                 for key, value in kpss_test[3].items():
                     results[f"Critical Value ({key})"] = value
                 container2.text(results)
-            #ARIMA MODELS TRAINING
-            arima_111 = ARIMA(
-                data_train[f"{feature} log"],
-                order = (1, 1, 1)
-            ).fit()
-            arima_212 = ARIMA(
-                data_train[f"{feature} log"],
-                order = (2, 1, 2)
-            ).fit()
-            #DATA FOR PLOTTING
-            arima_data = pd.DataFrame()
-            arima_data["pred_111_log"] = arima_111.fittedvalues.tolist() + arima_111.forecast(TEST_LENGTH).tolist()
-            arima_data["pred_111"] = np.exp(arima_data["pred_111_log"])
-            arima_data["pred_212_log"] = arima_212.fittedvalues.tolist() + arima_212.forecast(TEST_LENGTH).tolist()
-            arima_data["pred_212"] = np.exp(arima_data["pred_212_log"])
-            arima_data.index = data_yf2.index
+            #ARIMA MODELS, fitted with the other candidates of the feature
+            with st.spinner(
+                text = "Fitting forecast models"
+            ):
+                forecasts, leaderboard = forecast_leaderboard(
+                    element,
+                    data_yf2[feature],
+                    TEST_LENGTH
+                )
+            candidates = leaderboard[(leaderboard["Family"] == "ARIMA") & leaderboard["Error"].isna()]
+            if auto_order:
+                with st.spinner(
+                    text = "Searching ARIMA orders"
+                ):
+                    auto_arima_results = auto_arima(
+                        element,
+                        data_yf2[feature],
+                        TEST_LENGTH,
+                        max_fits = max_fits
+                    )
+                auto_fit = auto_arima_results["fit"]
+                grid4 = grid(4, vertical_align = True)
+                grid4.metric(
+                    label = "Auto-ARIMA order",
+                    value = str(auto_arima_results["order"])
+                )
+                grid4.metric(
+                    label = "Fits",
+                    value = f"{auto_arima_results['n_fits']} / {auto_arima_results['n_grid']}",
+                    help = f"Search stopped by {auto_arima_results['stop']}"
+                )
+                grid4.metric(
+                    label = "Search wall time",
+                    value = f"{auto_arima_results['wall_time']:.2f}s"
+                )
+                grid4.metric(
+                    label = "Differencing (ADF/KPSS)",
+                    value = f"d = {auto_arima_results['d']}"
+                )
+                with st.expander(
+                    label = "Auto-ARIMA - Search"
+                ):
+                    st.dataframe(
+                        auto_arima_results["search"],
+                        use_container_width = True
+                    )
+                    if auto_fit["error"] is None:
+                        st.text(auto_fit["summary"])
+                    else:
+                        st.text(auto_fit["error"])
             with st.expander(
                 label = "ARIMA - Summary"
             ):
                 cols = st.columns(2)
-                with cols[0]:
-                    st.write("#### **ARIMA(1,1,1)**")
-                    st.text(arima_111.summary())
-                with cols[1]:
-                    st.write("#### **ARIMA(2,1,2)**")
-                    st.text(arima_212.summary())
+                for col, candidate in zip(cols, ["arima_111", "arima_212"]):
+                    with col:
+                        st.write(f"#### **{FORECAST_CANDIDATES[candidate][1]}**")
+                        if forecasts[candidate]["summary"] is not None:
+                            st.text(forecasts[candidate]["summary"])
+                        else:
+                            st.text(forecasts[candidate]["error"])
             fig = go.Figure()
             fig.add_trace(
                 go.Scatter(
@@ -1185,22 +1126,24 @@ with main_tabs[2]: #FORECAST TAB
                     name = feature
                 )
             )
-            fig.add_trace(
-                go.Scatter(
-                    x = arima_data.index,
-                    y = arima_data["pred_111"],
-                    mode = "lines",
-                    name = "ARIMA(1,1,1)"
+            for candidate in candidates.index:
+                fig.add_trace(
+                    go.Scatter(
+                        x = data_yf2.index,
+                        y = forecasts[candidate]["prediction"],
+                        mode = "lines",
+                        name = candidates.loc[candidate, "Model"]
+                    )
                 )
-            )
-            fig.add_trace(
-                go.Scatter(
-                    x = arima_data.index,
-                    y = arima_data["pred_212"],
-                    mode = "lines",
-                    name = "ARIMA(2,1,2)"
+            if auto_order and auto_fit["error"] is None:
+                fig.add_trace(
+                    go.Scatter(
+                        x = data_yf2.index,
+                        y = auto_fit["prediction"],
+                        mode = "lines",
+                        name = f"Auto {auto_fit['prediction'].name}"
+                    )
                 )
-            )
             grid3 = grid([4, 1], vertical_align = True)
             container4 = grid3.container()
             container4.plotly_chart(
@@ -1208,23 +1151,106 @@ with main_tabs[2]: #FORECAST TAB
                 use_container_width = True
             )
             container5 = grid3.container()
-            mape_111 = mean_absolute_percentage_error(
-                data_yf[feature].iloc[-TEST_LENGTH:],
-                arima_data["pred_111"].iloc[-TEST_LENGTH:]
-            )
-            mape_212 = mean_absolute_percentage_error(
-                data_yf[feature].iloc[-TEST_LENGTH:],
-                arima_data["pred_212"].iloc[-TEST_LENGTH:]
-            )
             container5.write("### **Mean Absolute Percentage Error (MAPE)**")
-            container5.metric(
-                label = "MAPE of ARIMA(1,1,1)",
-                value = f"{100 * mape_111:.2f}%"
+            for candidate in candidates.index:
+                container5.metric(
+                    label = f"MAPE of {candidates.loc[candidate, 'Model']}",
+                    value = f"{100 * candidates.loc[candidate, 'MAPE']:.2f}%"
+                )
+            if auto_order and auto_fit["error"] is None:
+                container5.metric(
+                    label = f"MAPE of Auto {auto_fit['prediction'].name}",
+                    value = f"{100 * auto_fit['mape']:.2f}%"
+                )
+        except:
+            st.error("Not enough data to process. Choose another financial asset.")
+    with tabs[4]:
+        st.write("$$\\underline{\\huge{\\textbf{Rolling-Origin Backtest}}}$$")
+        grid1 = grid([2, 1, 1, 1, 3], vertical_align = True)
+        feature = grid1.selectbox(
+            label = "Feature",
+            options = [
+                "Open", 
+                "High", 
+                "Low", 
+                "Close", 
+                "Adj Close", 
+                "Volume"
+                ],
+            index = 4,
+            key = "feature_backtest"
+        )
+        n_origins = grid1.number_input(
+            label = "Origins",
+            min_value = 1,
+            value = BACKTEST_ORIGINS,
+            step = 1
+        )
+        horizon = grid1.number_input(
+            label = "Horizon",
+            min_value = 1,
+            value = BACKTEST_HORIZON,
+            step = 1
+        )
+        refit_every = grid1.number_input(
+            label = "Refit every",
+            min_value = 1,
+            value = BACKTEST_REFIT_EVERY,
+            step = 1
+        )
+        backtest_candidates = grid1.multiselect(
+            label = "Models",
+            options = list(FORECAST_CANDIDATES),
+            default = list(FORECAST_CANDIDATES),
+            format_func = lambda candidate: FORECAST_CANDIDATES[candidate][1]
+        )
+        try:
+            with st.spinner(
+                text = "Running the backtest"
+            ):
+                backtest_errors, backtest_summary, backtest_time = forecast_backtest(
+                    element,
+                    data_yf[feature],
+                    candidates = backtest_candidates,
+                    n_origins = n_origins,
+                    horizon = horizon,
+                    refit_every = refit_every
+                )
+            st.caption(
+                f"{len(backtest_errors)} forecasts with {int(backtest_summary['Full fits'].sum())} full fits "
+                f"in {backtest_time:.2f}s"
             )
-            container5.metric(
-                label = "MAPE of ARIMA(2,1,2)",
-                value = f"{100 * mape_212:.2f}%"
+            st.dataframe(
+                backtest_summary,
+                use_container_width = True
             )
+            backtest_errors["Model"] = backtest_errors["Candidate"].map(lambda candidate: FORECAST_CANDIDATES[candidate][1])
+            cols = st.columns(2)
+            with cols[0]:
+                fig = px.box(
+                    backtest_errors,
+                    x = "Model",
+                    y = "MAPE",
+                    title = "MAPE distribution over the origins"
+                )
+                st.plotly_chart(
+                    fig,
+                    use_container_width = True
+                )
+            with cols[1]:
+                horizon_error = backtest_errors.groupby("Model")[[f"h{h + 1}" for h in range(horizon)]].mean().T
+                fig = px.line(
+                    horizon_error,
+                    title = "Mean absolute percentage error by horizon"
+                )
+                fig.update_layout(
+                    xaxis_title = "Horizon",
+                    yaxis_title = "APE"
+                )
+                st.plotly_chart(
+                    fig,
+                    use_container_width = True
+                )
         except:
             st.error("Not enough data to process. Choose another financial asset.")
 with main_tabs[3]: #ANOMALY DETECTION TAB
@@ -1510,6 +1536,7 @@ with main_tabs[4]: #VOLATILITY TAB
     ])
     returns = 100 * data_yf["Adj Close"].pct_change().dropna()
     returns.name = "asset_returns"
+    data_interval = periods_and_intervals[1]["interval"][interval_filter]
     with tabs[0]:
         subtabs = st.tabs([
             "ARCH Model",
@@ -1537,20 +1564,21 @@ with main_tabs[4]: #VOLATILITY TAB
                 )
             with cols[1]:
                 try:
-                    model = arch_model(
+                    #parameters from the last refit, the volatility filtered over every bar
+                    volatility_state = update_garch(
+                        (element, data_interval),
                         returns,
                         mean = "zero",
                         vol = "ARCH",
                         p = 1,
                         q = 0
                     )
-                    fitted_model = model.fit(disp = "off")
                     with st.expander(
                         label = "ARCH Model - Summary"
                     ):
-                        st.write(fitted_model.summary())
+                        st.text(volatility_state["summary"])
                     st.pyplot(
-                        fitted_model.plot(annualize = "D"),
+                        garch_fixed_model(volatility_state, returns).plot(annualize = "D"),
                         use_container_width = True)
                 except:
                     st.write("No informations.")
@@ -1576,21 +1604,32 @@ with main_tabs[4]: #VOLATILITY TAB
                 )
             with cols[1]:
                 try:
-                    model = arch_model(
+                    #variance state carried across reruns, only the new bars are filtered
+                    volatility_state = update_garch(
+                        (element, data_interval),
                         returns,
                         mean = "zero",
                         vol = "GARCH",
                         p = 1,
                         q = 1
                     )
-                    fitted_model = model.fit(disp = "off")
                     with st.expander(
                         label = "GARCH Model - Summary"
                     ):
-                        st.write(fitted_model.summary())
+                        st.text(volatility_state["summary"])
                     st.pyplot(
-                        fitted_model.plot(annualize = "D"),
+                        garch_fixed_model(volatility_state, returns).plot(annualize = "D"),
                         use_container_width = True)
+                    metrics = st.columns(3)
+                    metrics[0].metric(
+                        label = "Next bar volatility",
+                        value = f"{np.sqrt(garch_next_variance(volatility_state)):.3f}%")
+                    metrics[1].metric(
+                        label = "Bars since refit",
+                        value = volatility_state["bars_since_refit"])
+                    metrics[2].metric(
+                        label = "Last update",
+                        value = volatility_state["refit_reason"])
                 except:
                     st.write("No informations.")
     with tabs[1]:
@@ -1599,8 +1638,8 @@ with main_tabs[4]: #VOLATILITY TAB
             "Simulation Forecasts",
             "Bootstrap Forecasts"
         ])
-        model = arch_model(
-            returns,
+        #one incrementally updated state per prediction interval feeds the three forecast methods
+        garch_spec = dict(
             mean = "zero",
             vol = "GARCH",
             dist = "t",
@@ -1641,9 +1680,11 @@ with main_tabs[4]: #VOLATILITY TAB
                 )
                 SPLIT_DATE = dt.datetime.now() - dt.timedelta(days = pred_int_dict[prediction_interval])
                 try:
-                    fitted_model = model.fit(
-                        last_obs = SPLIT_DATE,
-                        disp = "off"
+                    fitted_model = garch_forecast_model(
+                        (element, data_interval, prediction_interval),
+                        returns,
+                        SPLIT_DATE,
+                        **garch_spec
                     )
                     forecasts = fitted_model.forecast(
                         horizon = 3,
@@ -1692,9 +1733,11 @@ with main_tabs[4]: #VOLATILITY TAB
                 )
                 SPLIT_DATE = dt.datetime.now() - dt.timedelta(days = pred_int_dict[prediction_interval])
                 try:
-                    fitted_model = model.fit(
-                        last_obs = SPLIT_DATE,
-                        disp = "off"
+                    fitted_model = garch_forecast_model(
+                        (element, data_interval, prediction_interval),
+                        returns,
+                        SPLIT_DATE,
+                        **garch_spec
                     )
                     forecasts = fitted_model.forecast(
                         horizon = 3,
@@ -1744,9 +1787,11 @@ with main_tabs[4]: #VOLATILITY TAB
                 )
                 SPLIT_DATE = dt.datetime.now() - dt.timedelta(days = pred_int_dict[prediction_interval])
                 try:
-                    fitted_model = model.fit(
-                        last_obs = SPLIT_DATE,
-                        disp = "off"
+                    fitted_model = garch_forecast_model(
+                        (element, data_interval, prediction_interval),
+                        returns,
+                        SPLIT_DATE,
+                        **garch_spec
                     )
                     try:
                         forecasts = fitted_model.forecast(
@@ -1779,7 +1824,17 @@ with main_tabs[5]: #SIMULATIONS TAB
             "6 months": 180,
             "1 year": 365
     }
-    grid1 = grid(3, vertical_align = True)
+    grid1 = grid(4, vertical_align = True)
+    simulation_model = grid1.selectbox(
+        label = "Model",
+        options = [
+            "GBM",
+            "GARCH(1,1)",
+            "Block Bootstrap",
+            "Jump Diffusion"
+        ],
+        key = "sim0"
+    )
     feature = grid1.selectbox(
         label = "Feature",
         options = [
@@ -1805,9 +1860,9 @@ with main_tabs[5]: #SIMULATIONS TAB
     N_SIM = grid1.slider(
         label = "Number of simulated paths",
         min_value = 100,
-        max_value = 10000,
+        max_value = 1000000,
         step = 100,
-        value = 100
+        value = 1000
     )
     try:
         returns = data_yf[feature].pct_change().dropna()
@@ -1817,13 +1872,36 @@ with main_tabs[5]: #SIMULATIONS TAB
         S_0 = data_yf.loc[train.index[-1], feature]
         mu = train.mean()
         sigma = train.std()
-        gbm_simulations = simulate_gbm(S_0, mu, sigma, N_SIM, T, N)
-        sim_df = pd.DataFrame(
-            np.transpose(gbm_simulations),
-            index = train.index[-1:].union(test.index))
-        res_df = sim_df.mean(axis = 1).to_frame()
-        res_df = res_df.join(data_yf[feature])
-        res_df.columns = ["simulation_average", f"{feature}_price"]
+        if simulation_model == "GBM":
+            simulations = simulate_gbm(S_0, mu, sigma, N_SIM, T, N)
+        elif simulation_model == "GARCH(1,1)":
+            #GARCH(1,1) on the training returns of the selected feature only, as the other models
+            simulation_state = update_garch(
+                (element, data_interval, "simulation", feature),
+                100 * train,
+                mean = "zero",
+                vol = "GARCH",
+                p = 1,
+                q = 1
+            )
+            omega, alpha, beta, sigma2_0 = garch_simulation_parameters(simulation_state)
+            simulations = simulate_garch(S_0, mu, omega, alpha, beta, sigma2_0, N_SIM, N)
+        elif simulation_model == "Block Bootstrap":
+            simulations = simulate_bootstrap(S_0, np.log1p(train).values, N_SIM, N)
+        elif simulation_model == "Jump Diffusion":
+            jumps = jump_parameters(np.log1p(train))
+            simulations = simulate_jump_diffusion(
+                S_0,
+                mu,
+                jumps["sigma"],
+                jumps["jump_intensity"],
+                jumps["jump_mean"],
+                jumps["jump_std"],
+                N_SIM,
+                T,
+                N)
+        sim_index = train.index[-1:].union(test.index)
+        actual = data_yf.loc[sim_index, feature].rename(f"{feature}_price")
         cols = st.columns(2)
         with cols[0]:
             st.write("$$\\huge{\\textbf{Returns}}$$")
@@ -1841,15 +1919,11 @@ with main_tabs[5]: #SIMULATIONS TAB
                 use_container_width = True
             )
         with cols[1]:
-            ax = sim_df.plot(
-                alpha = 0.3,
-                legend = False,
-                title = "Simulation's results"
-            )
-            ax = res_df.plot(ax = ax, color = ["red", "blue"])
-            st.pyplot(
-                ax.figure,
+            fig = fan_chart(simulations, sim_index, actual)
+            st.plotly_chart(
+                fig,
                 use_container_width = True
             )
+            st.write(f"{simulations['n_sims']:,} paths in {simulations['elapsed']:.2f}s ({simulations['paths_per_second']:,.0f} paths/second)")
     except:
         st.write("No informations.")
\ No newline at end of file